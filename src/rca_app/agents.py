@@ -1,38 +1,633 @@
 from __future__ import annotations
 
+import asyncio
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from itertools import islice
 import logging
-from typing import Any, Dict, List
+import re
+import threading
+import weakref
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from langchain.agents import create_agent
 from langchain.agents.middleware import TodoListMiddleware
+from langchain.agents.structured_output import ToolStrategy
 from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
 from langchain.tools import tool
 from langmem import create_manage_memory_tool, create_search_memory_tool
+import orjson
 
 from .config import AppConfig
-from .llm import get_llm_model
-from .memory import build_memory_augmented_prompt, append_rca_history
-from .toolset_registry import ToolsetRegistry
+from .llm import get_llm_model, get_shared_embeddings
+from .memory import append_rca_history, cached_memory_augmented_prompt
+from .semantic_cache import SQLiteBackedSemanticCache, lexical_fingerprint
+from .toolset_registry import Toolset, ToolsetRegistry
 from .toolsets import build_salesforce_toolset, build_sap_business_one_toolset
-from .types import RCAState
-from .utils import filter_tool_messages, handle_tool_errors, process_response, serialize_messages
+from .types import (
+    HypothesisOutput,
+    HypothesisValidationOutput,
+    InventoryAnalysisOutput,
+    RCAState,
+    RootCause,
+    RootCauseAnalysisOutput,
+    SalesAnalysisOutput,
+)
+from .utils import (
+    TOOL_ERROR_PREFIX,
+    ModelConcurrencyMiddleware,
+    filter_tool_messages,
+    handle_tool_errors,
+    process_response,
+    serialize_messages,
+    to_prompt_json,
+)
 
 logger = logging.getLogger(__name__)
 
-def build_hypothesis_tool(config: AppConfig, store, checkpointer, llm):
-    hypothesis_react_agent = create_agent(
-        model=llm,
-        tools=[
-            create_manage_memory_tool(namespace=("hypothesis", "{user_id}")),
-            create_search_memory_tool(namespace=("hypothesis", "{user_id}")),
+_AGENT_CACHE: "weakref.WeakValueDictionary[Tuple[Any, ...], Any]" = weakref.WeakValueDictionary()
+
+# Stateless, so every router shares one instance and stays cacheable.
+_TODO_MIDDLEWARE = TodoListMiddleware()
+
+_RUN_TRACE: ContextVar[List[Dict[str, Any]] | None] = ContextVar("rca_run_trace", default=None)
+
+MAX_HYPOTHESES = 8
+VALIDATION_CHUNK_SIZE = 4
+
+SALES_KEYWORDS_RE = re.compile(
+    r"sales|demand|promotion|spike|forecast|underestimated", re.IGNORECASE
+)
+INVENTORY_KEYWORDS_RE = re.compile(
+    r"inventory|stock|supply|replenish|transfer|shrink|adjust|warehouse", re.IGNORECASE
+)
+
+HYPOTHESIS_SYSTEM_PROMPT = """
+You are an RCA hypothesis-generation expert.
+
+The first user message carries memory context: use it only for reasoning,
+do not repeat it.
+
+Your task:
+Given the user input, generate possible root-cause hypotheses.
+
+STRICT OUTPUT RULES:
+1. Output **only valid JSON**.
+2. Root JSON object must have exactly two fields:
+   - "hypotheses": an array of **plain strings**.
+   - "reasoning": a string explaining how the hypotheses were generated.
+3. No markdown or code fences.
+4. No extra commentary or fields.
+
+JSON schema:
+{
+  "hypotheses": ["...", "..."],
+  "reasoning": "..."
+}
+"""
+
+SALES_SYSTEM_PROMPT = """
+You are a Sales Analysis Agent for RCA.
+
+The first user message carries memory context: use it only for reasoning,
+do not repeat it.
+
+Your responsibilities:
+- Use available tools to analyze sales patterns
+- Validate or refute sales-related hypotheses
+
+STRICT OUTPUT RULES:
+1. Output ONLY valid JSON
+2. Root JSON object MUST contain EXACTLY ONE key: "sales_insights"
+3. NO extra keys, commentary, or markdown
+
+JSON schema:
+{
+  "sales_insights": {...}
+}
+"""
+
+INVENTORY_SYSTEM_PROMPT = """
+You are the Inventory RCA Agent.
+
+The first user message carries memory context: use it only for reasoning,
+do not repeat it.
+
+Your responsibilities:
+- Analyze inventory levels, movements, transfers, adjustments, and replenishments
+- Use available tools via a ReAct loop
+- Produce structured insights
+
+STRICT OUTPUT RULES:
+1. Output ONLY valid JSON
+2. Root JSON object MUST contain EXACTLY ONE key: "inventory_insights"
+3. NO extra keys, markdown, or commentary
+
+JSON schema:
+{
+  "inventory_insights": {...}
+}
+"""
+
+MEMORY_CONTEXT_TEMPLATE = "Memory context:\n{memory_context}"
+
+SALES_USER_TEMPLATE = """
+Task: {task}
+Hypotheses: {hypotheses}
+"""
+
+INVENTORY_USER_TEMPLATE = """
+Task: {task}
+Hypotheses to validate: {hypotheses}
+"""
+
+VALIDATION_SYSTEM_PROMPT = """
+Validate each hypothesis using sales and inventory insights.
+
+STRICT OUTPUT RULES:
+1. Output ONLY valid JSON
+2. No markdown or code fences
+3. No extra fields or commentary
+
+JSON schema:
+{
+  "validated": { "hypothesis": true | false },
+  "reasoning": { "hypothesis": "explanation" }
+}
+"""
+
+VALIDATION_USER_TEMPLATE = """
+Hypotheses:
+{hypotheses}
+
+Sales insights:
+{sales_insights}
+
+Inventory insights:
+{inventory_insights}
+"""
+
+ROOT_CAUSE_SYSTEM_PROMPT = """
+Produce a final Root Cause Analysis.
+
+Include:
+- primary root causes
+- supporting evidence
+- contributing factors
+- timeline
+- recommendations
+
+STRICT OUTPUT RULES:
+1. Output ONLY valid JSON
+2. No markdown or code fences
+3. No extra commentary
+4. JSON MUST contain EXACTLY two top-level keys:
+   - "root_cause"
+   - "reasoning"
+
+JSON schema:
+{
+  "root_cause": {
+    "primary_root_causes": ["string"],
+    "supporting_evidence": {
+      "sales": {},
+      "inventory": {},
+      "cross_analysis": {}
+    },
+    "contributing_factors": ["string"],
+    "timeline": [
+      { "date": "YYYY-MM-DD", "event": "string" }
+    ],
+    "recommendations": ["string"]
+  },
+  "reasoning": {
+    "primary_root_causes": "explanation",
+    "contributing_factors": "explanation",
+    "supporting_evidence": "explanation",
+    "timeline": "explanation",
+    "recommendations": "explanation"
+  }
+}
+"""
+
+ROOT_CAUSE_USER_TEMPLATE = """
+Validated hypotheses:
+{validated_hypotheses}
+
+Sales insights:
+{sales_insights}
+
+Inventory insights:
+{inventory_insights}
+
+Prior trace summary for query {query_id} (use fetch_trace_section for the full entries):
+{trace_summary}
+"""
+
+REPORT_SYSTEM_PROMPT = """
+You are an expert supply chain and demand planning analyst.
+
+Create a professional Root Cause Analysis Report.
+
+Audience:
+- Demand Planning
+- Inventory Management
+- Supply Chain Teams
+
+Requirements:
+- Clear structured sections
+- Bullet points where appropriate
+- No JSON, no code
+- Pure narrative report
+
+The report MUST include:
+- Executive Summary
+- Primary Root Cause(s)
+- Supporting Evidence
+- Contributing Factors
+- Key Data Points
+- Timeline of Events
+- Recommendations
+- Final Conclusion
+
+Tone:
+Analytical, data-driven, formal, concise.
+"""
+
+REPORT_USER_TEMPLATE = """
+Use the following structured RCA output:
+
+{root_cause}
+{reasoning}
+"""
+
+NO_ROOT_CAUSE_REPORT_TEMPLATE = """Root Cause Analysis Report
+
+Executive Summary
+No root cause could be confirmed from the available sales and inventory evidence.
+
+Analysis Notes
+{reasoning}
+
+Recommendations
+- Review the hypotheses that failed validation and gather additional data.
+- Re-run the analysis once new evidence is available.
+"""
+
+# The orchestration system prompt is kept free of per-request data so every
+# router call shares the same prompt prefix and can hit the provider's
+# prompt cache; task, ids and memory go in the first user message instead.
+ORCHESTRATION_SYSTEM_PROMPT = """
+You are a Deep Research Agent.
+
+The first user message carries the task, the User Id and Query Id to pass
+to tools, and the semantic abstract + procedural + episodic + conversation
+memory context.
+
+Your role is to analyze the user's input, determine the appropriate
+research or response strategy, and use the available tools to resolve
+the request.
+
+The set of tools available to you may change dynamically.
+You must infer what each tool does from its description.
+
+------------------------------------------------------------
+CORE RESPONSIBILITIES:
+
+1. Understand User Intent
+  - The user input may be:
+    • a greeting or help request (e.g., "hi", "hello", "help")
+    • a general question
+    • a root cause analysis or supply chain investigation
+  - Do not assume the input is analytical.
+
+2. Decide the Level of Depth Required
+  - If the input can be addressed with a simple explanation or response,
+    prefer a lightweight approach.
+  - If the input requires investigation, reasoning, or analysis,
+    proceed with deep research behavior.
+
+3. Create an Internal Plan
+  - Before calling any tool, determine:
+    • what information is missing
+    • what needs to be discovered or generated
+    • whether memory or prior context is relevant
+  - The plan does not need to be shown unless required by a tool.
+
+4. Execute Using Tools
+  - Use the **todo's** tools to carry out the plan.
+  - Choose tools based on their descriptions, not their names.
+  - You may call multiple tools if necessary.
+  - When tools do not depend on each other's output (e.g. sales and
+    inventory analysis of the same hypotheses), request them together
+    in a single turn; they are executed concurrently.
+  - Always prefer the minimal set of tool calls needed.
+
+5. RCA-Specific Behavior (when applicable)
+  - When the task involves diagnosing causes of a problem:
+    • avoid jumping to conclusions
+    • favor hypothesis generation before validation
+    • rely on state, memory, and evidence
+
+------------------------------------------------------------
+IMPORTANT RULES:
+
+- Do not hard-code assumptions about tool availability.
+- Do not invent tools or capabilities.
+- Do not answer complex questions directly in free text
+  if an appropriate tool exists.
+- Be robust to vague, short, or conversational user inputs.
+- Think first, then act through tools.
+
+You are expected to behave as a flexible, adaptive
+deep-research agent, not a fixed pipeline.
+"""
+
+ORCHESTRATION_CONTEXT_TEMPLATE = """
+Task: {task}
+
+User Id: {user_id}
+
+Query Id: {query_id}
+
+Memory Context(memory_context):'''{memory_context}'''
+"""
+
+# System messages never change, so they are built once and shared by every
+# call; LangGraph converts them into fresh message objects without mutating them.
+_HYPOTHESIS_SYSTEM_MESSAGE = {"role": "system", "content": HYPOTHESIS_SYSTEM_PROMPT}
+_SALES_SYSTEM_MESSAGE = {"role": "system", "content": SALES_SYSTEM_PROMPT}
+_INVENTORY_SYSTEM_MESSAGE = {"role": "system", "content": INVENTORY_SYSTEM_PROMPT}
+_VALIDATION_SYSTEM_MESSAGE = {"role": "system", "content": VALIDATION_SYSTEM_PROMPT}
+_ROOT_CAUSE_SYSTEM_MESSAGE = {"role": "system", "content": ROOT_CAUSE_SYSTEM_PROMPT}
+_REPORT_SYSTEM_MESSAGE = {"role": "system", "content": REPORT_SYSTEM_PROMPT}
+_ORCHESTRATION_SYSTEM_MESSAGE = {"role": "system", "content": ORCHESTRATION_SYSTEM_PROMPT}
+
+
+@lru_cache(maxsize=None)
+def _model_concurrency_limiter(limit: int) -> ModelConcurrencyMiddleware:
+    # One shared limiter, so the cap applies across all agents in the process.
+    return ModelConcurrencyMiddleware(limit)
+
+
+@lru_cache(maxsize=8)
+def _toolsets_for(config: AppConfig) -> Tuple[Toolset, Toolset, ToolsetRegistry]:
+    # Toolsets only depend on the MCP endpoints, so agent rebuilds reuse them.
+    salesforce_toolset = build_salesforce_toolset(config)
+    sap_toolset = build_sap_business_one_toolset(config)
+    return salesforce_toolset, sap_toolset, ToolsetRegistry([salesforce_toolset, sap_toolset])
+
+
+@lru_cache(maxsize=8)
+def _llm_for(config: AppConfig):
+    # Rebuilds for the same configuration share one model, so the agents
+    # cached on it (keyed by the model's id) are reused too.
+    return get_llm_model(config)
+
+
+@lru_cache(maxsize=8)
+def _semantic_cache_for(config: AppConfig) -> SQLiteBackedSemanticCache:
+    # One cache (and SQLite connection) per configuration, shared by rebuilds.
+    return SQLiteBackedSemanticCache(
+        config.data_dir / "semantic_cache.sqlite",
+        get_shared_embeddings(config).embed_query,
+        threshold=config.semantic_cache_threshold,
+        ttl_seconds=config.semantic_cache_ttl_seconds,
+    )
+
+
+def _sales_tools(config: AppConfig) -> List[Any]:
+    salesforce_toolset, _, _ = _toolsets_for(config)
+    return list(salesforce_toolset.tools)
+
+
+def _inventory_tools(config: AppConfig) -> List[Any]:
+    _, sap_toolset, tool_registry = _toolsets_for(config)
+    try:
+        promo_tool = tool_registry.find_tool("get_promo_period")
+    except KeyError as exc:
+        logger.warning("Inventory agent will run without the promo period tool: %s", exc)
+        return list(sap_toolset.tools)
+    return [promo_tool, *sap_toolset.tools]
+
+
+class _LazyAgent:
+    """Build a sub-agent on first use.
+
+    The sales and inventory agents need their MCP server's tool list, so
+    they are built when the analysis first runs rather than at start-up.
+    A failed build is retried on the next call.
+    """
+
+    def __init__(self, build: Callable[[], Any]) -> None:
+        self._build = build
+        self._agent = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        with self._lock:
+            if self._agent is None:
+                self._agent = self._build()
+            return self._agent
+
+    async def aget(self) -> Any:
+        if self._agent is not None:
+            return self._agent
+        # Listing MCP tools blocks, so the first build runs off the event loop.
+        return await asyncio.to_thread(self.get)
+
+
+@lru_cache(maxsize=None)
+def _manage_memory_tool(namespace_head: str):
+    # The "{user_id}" placeholder is resolved from the run config on every
+    # call, so one tool per namespace serves all users and agent rebuilds.
+    return create_manage_memory_tool(namespace=(namespace_head, "{user_id}"))
+
+
+@lru_cache(maxsize=None)
+def _search_memory_tool(namespace_head: str):
+    return create_search_memory_tool(namespace=(namespace_head, "{user_id}"))
+
+
+def _create_react_agent(
+    name: str,
+    config: AppConfig,
+    llm,
+    tools: List[Any],
+    store,
+    checkpointer,
+    middleware: Tuple[Any, ...] = (handle_tool_errors,),
+    max_concurrency: int | None = None,
+    response_format=None,
+    key_tools_by_name: bool = False,
+):
+    # The cached agent holds references to the llm, store, checkpointer, tools
+    # and middleware, so their ids stay unique for as long as the entry is
+    # alive. Tools are keyed by identity by default: tools built for another
+    # store or checkpointer close over those and must not be reused. Callers
+    # whose tools are fully determined by the rest of the key may key by name.
+    key = (
+        name,
+        config,
+        id(llm),
+        id(store),
+        id(checkpointer),
+        tuple(tool.name for tool in tools) if key_tools_by_name else tuple(map(id, tools)),
+        tuple(map(id, middleware)),
+        max_concurrency,
+        response_format,
+    )
+    agent = _AGENT_CACHE.get(key)
+    if agent is None:
+        logger.debug("Building %s agent with %s tools", name, len(tools))
+        agent = create_agent(
+            model=llm,
+            tools=list(tools),
+            middleware=[*middleware, _model_concurrency_limiter(config.llm_concurrency_limit)],
+            store=store,
+            checkpointer=checkpointer,
+            response_format=ToolStrategy(response_format) if response_format else None,
+        )
+        if max_concurrency is not None:
+            agent = agent.with_config({"max_concurrency": max_concurrency})
+        _AGENT_CACHE[key] = agent
+    return agent
+
+
+def _dedupe_hypotheses(hypotheses: Iterable[str], limit: int = MAX_HYPOTHESES) -> List[str]:
+    # Retries often repeat a hypothesis with different casing or spacing;
+    # keep the first spelling and cap the list to bound prompt size.
+    seen = set()
+    unique: List[str] = []
+    for hypothesis in hypotheses:
+        key = " ".join(hypothesis.lower().split())
+        if key not in seen:
+            seen.add(key)
+            unique.append(hypothesis)
+    return unique[:limit]
+
+
+def _stream_writer():
+    # Tools can also be invoked directly, outside a LangGraph run.
+    try:
+        return get_stream_writer()
+    except (KeyError, RuntimeError):
+        return lambda _: None
+
+
+def _has_root_cause(root_cause: str) -> bool:
+    # Only clearly empty input skips the report: blank text, null, {} or [],
+    # or an explicitly empty primary_root_causes list. The root cause tool's
+    # own {"root_cause": {...}} envelope is unwrapped first.
+    try:
+        parsed = orjson.loads(root_cause)
+    except orjson.JSONDecodeError:
+        return bool(root_cause.strip())
+    if isinstance(parsed, dict) and isinstance(parsed.get("root_cause"), dict):
+        parsed = parsed["root_cause"]
+    if isinstance(parsed, dict) and "primary_root_causes" in parsed:
+        return bool(parsed["primary_root_causes"])
+    return bool(parsed)
+
+
+async def _agent_output(result: Dict[str, Any], llm) -> Dict[str, Any]:
+    structured = result.get("structured_response")
+    if structured is not None:
+        return structured.model_dump()
+    # The fallback may call the LLM synchronously to repair malformed JSON.
+    return await asyncio.to_thread(process_response, result["messages"][-1].content, llm=llm)
+
+
+def _internal_messages(result: Dict[str, Any], input_count: int):
+    # Drop the final answer; with structured output that is the response tool
+    # call plus its acknowledgement.
+    messages = result["messages"]
+    tail = 2 if result.get("structured_response") is not None else 1
+    return islice(messages, input_count, len(messages) - tail)
+
+
+def _record_trace(output: Dict[str, Any]) -> Dict[str, Any]:
+    # Inside an orchestration run, trace entries are collected on the side
+    # instead of being returned to the router, which would otherwise read
+    # (and pay tokens for) every sub-agent's message log.
+    run_trace = _RUN_TRACE.get()
+    if run_trace is None:
+        return output
+    run_trace.extend(output.get("trace", []))
+    return {key: value for key, value in output.items() if key != "trace"}
+
+
+def _is_cacheable(output: Dict[str, Any]) -> bool:
+    # Tool failures and missing insights are transient; replaying them would
+    # pin a bad answer for every near-duplicate request until the entry expires.
+    if any(value is None for key, value in output.items() if key != "trace"):
+        return False
+    for entry in output.get("trace", []):
+        for call in entry.get("calls") or []:
+            content = call.get("content")
+            if (
+                call.get("type") == "ToolMessage"
+                and isinstance(content, str)
+                and content.startswith(TOOL_ERROR_PREFIX)
+            ):
+                return False
+    return True
+
+
+async def _with_semantic_cache(semantic_cache, namespace, messages, run, lexical_text, *lexical_parts):
+    # The full prompt is embedded, but only ``lexical_text`` (the task and its
+    # entities) and ``lexical_parts`` are fingerprinted: memory context and
+    # history vary between otherwise identical requests.
+    if semantic_cache is None:
+        return _record_trace(await run())
+
+    computed = False
+
+    async def compute() -> Dict[str, Any]:
+        nonlocal computed
+        computed = True
+        return await run()
+
+    key_text = "\n".join(message["content"] for message in messages)
+    output = await semantic_cache.aget_or_compute(
+        namespace,
+        key_text,
+        compute,
+        lexical_key=lexical_fingerprint(lexical_text, *lexical_parts),
+        cacheable=_is_cacheable,
+    )
+    if computed:
+        return _record_trace(output)
+
+    logger.debug("Serving %s from the semantic cache", namespace[0])
+    # Mark replayed trace entries so evaluation can tell them from fresh runs.
+    return _record_trace(
+        {
+            **output,
+            "trace": [{**entry, "cached": True} for entry in output.get("trace", [])],
+        }
+    )
+
+
+def build_hypothesis_tool(config: AppConfig, store, checkpointer, llm, semantic_cache=None):
+    hypothesis_react_agent = _create_react_agent(
+        "hypothesis",
+        config,
+        llm,
+        [
+            _manage_memory_tool("hypothesis"),
+            _search_memory_tool("hypothesis"),
         ],
-        middleware=[handle_tool_errors],
-        store=store,
-        checkpointer=checkpointer,
+        store,
+        checkpointer,
+        response_format=HypothesisOutput,
     )
 
     @tool
-    def hypothesis_agent_tool(task: str, user_id: str, query_id: str, memory_context: str) -> Dict[str, Any]:
+    async def hypothesis_agent_tool(task: str, user_id: str, query_id: str, memory_context: str) -> Dict[str, Any]:
         """
         Purpose:
             Generate multiple plausible root-cause hypotheses for a given RCA query.
@@ -51,7 +646,6 @@ def build_hypothesis_tool(config: AppConfig, store, checkpointer, llm):
         Output:
             - dict: Contains updated fields:
                 - "hypotheses" (List[str]): Newly generated root-cause hypotheses.
-                - "trace" (List[Dict]): Trace entry recording the tool call.
 
         Notes:
             - Hypotheses are returned as plain strings with no categorization.
@@ -66,76 +660,57 @@ def build_hypothesis_tool(config: AppConfig, store, checkpointer, llm):
             len(task),
         )
         messages = [
+            _HYPOTHESIS_SYSTEM_MESSAGE,
             {
-                "role": "system",
-                "content": f"""
-You are an RCA hypothesis-generation expert.
-
-Context (do not repeat, only use for reasoning):
-{memory_context}
-
-Your task:
-Given the user input, generate possible root-cause hypotheses.
-
-STRICT OUTPUT RULES:
-1. Output **only valid JSON**.
-2. Root JSON object must have exactly two fields:
-   - "hypotheses": an array of **plain strings**.
-   - "reasoning": a string explaining how the hypotheses were generated.
-3. No markdown or code fences.
-4. No extra commentary or fields.
-
-JSON schema:
-{{
-  "hypotheses": ["...", "..."],
-  "reasoning": "..."
-}}
-""",
+                "role": "user",
+                "content": MEMORY_CONTEXT_TEMPLATE.format(memory_context=memory_context),
             },
             {"role": "user", "content": task},
         ]
 
-        tool_config = {"configurable": {"user_id": user_id, "thread_id": query_id}}
+        async def run() -> Dict[str, Any]:
+            tool_config = {"configurable": {"user_id": user_id, "thread_id": query_id}}
 
-        result = hypothesis_react_agent.invoke({"messages": messages}, tool_config)
-        final_msg = result["messages"][-1].content
-        output = process_response(final_msg, llm=llm)
+            result = await hypothesis_react_agent.ainvoke({"messages": messages}, tool_config)
+            output = await _agent_output(result, llm)
 
-        hypotheses: List[str] = output.get("hypotheses", [])
-        logger.debug("Hypothesis tool produced %s hypotheses", len(hypotheses))
+            hypotheses = _dedupe_hypotheses(output.get("hypotheses", []))
+            logger.debug("Hypothesis tool produced %s hypotheses", len(hypotheses))
 
-        internal_msgs = result["messages"][2:-1]
-        tool_call_msgs = filter_tool_messages(internal_msgs)
+            internal_msgs = _internal_messages(result, len(messages))
+            tool_call_msgs = filter_tool_messages(internal_msgs)
 
-        trace_entry = {
-            "agent": "HypothesisAgent",
-            "step": "Generated hypotheses",
-            "calls": serialize_messages(tool_call_msgs),
-            "hypotheses": hypotheses,
-        }
+            trace_entry = {
+                "agent": "HypothesisAgent",
+                "step": "Generated hypotheses",
+                "calls": serialize_messages(tool_call_msgs),
+                "hypotheses": hypotheses,
+            }
 
-        return {"hypotheses": hypotheses, "trace": [trace_entry]}
+            return {"hypotheses": hypotheses, "trace": [trace_entry]}
 
-    return hypothesis_agent_tool
+        return await _with_semantic_cache(semantic_cache, ("hypothesis", user_id), messages, run, task)
 
+    return hypothesis_agent_tool
 
-def build_sales_analysis_tool(config: AppConfig, store, checkpointer, llm, sales_tools):
-    sales_tools = list(sales_tools)
-    sales_tools += [
-        create_manage_memory_tool(namespace=("sales", "{user_id}")),
-        create_search_memory_tool(namespace=("sales", "{user_id}")),
-    ]
 
-    sales_react_agent = create_agent(
-        model=llm,
-        tools=sales_tools,
-        middleware=[handle_tool_errors],
-        store=store,
-        checkpointer=checkpointer,
+def build_sales_analysis_tool(
+    config: AppConfig, store, checkpointer, llm, load_sales_tools: Callable[[], List[Any]], semantic_cache=None
+):
+    sales_react_agent = _LazyAgent(
+        lambda: _create_react_agent(
+            "sales",
+            config,
+            llm,
+            [*load_sales_tools(), _manage_memory_tool("sales"), _search_memory_tool("sales")],
+            store,
+            checkpointer,
+            response_format=SalesAnalysisOutput,
+        )
     )
 
     @tool
-    def sales_analysis_agent_tool(
+    async def sales_analysis_agent_tool(
         task: str,
         hypotheses: List[str],
         user_id: str,
@@ -170,108 +745,168 @@ def build_sales_analysis_tool(config: AppConfig, store, checkpointer, llm, sales
                 - "sales_insights":
                     Structured findings derived from sales and promotion data
                     that support or refute the provided hypotheses.
-                - "trace":
-                    A list of trace entries capturing tool calls and reasoning
-                    steps performed during the analysis.
         Notes:
             - This tool may call sales and promotion data tools as needed.
             - The output is strictly structured and intended for downstream
               RCA agents or summarization steps.
             - The tool does not mutate external state.
         """
+        hypotheses = _dedupe_hypotheses(hypotheses)
         logger.debug(
             "Sales analysis tool invoked user_id=%s query_id=%s hypotheses=%s",
             user_id,
             query_id,
             len(hypotheses),
         )
-        sales_related_hypotheses = [
-            h
-            for h in hypotheses
-            if any(
-                k in h.lower()
-                for k in ["sales", "demand", "promotion", "spike", "forecast", "underestimated"]
-            )
-        ]
+        sales_related_hypotheses = [h for h in hypotheses if SALES_KEYWORDS_RE.search(h)]
         if not sales_related_hypotheses:
             sales_related_hypotheses = hypotheses
 
         messages = [
+            _SALES_SYSTEM_MESSAGE,
             {
-                "role": "system",
-                "content": f"""
-You are a Sales Analysis Agent for RCA.
+                "role": "user",
+                "content": MEMORY_CONTEXT_TEMPLATE.format(memory_context=memory_context),
+            },
+            {
+                "role": "user",
+                "content": SALES_USER_TEMPLATE.format(
+                    task=task, hypotheses=to_prompt_json(sales_related_hypotheses)
+                ),
+            },
+        ]
 
-Context (do not repeat, only use for reasoning):
-{memory_context}
+        async def run() -> Dict[str, Any]:
+            tool_config = {"configurable": {"user_id": user_id, "thread_id": f"{query_id}:sales"}}
+            agent = await sales_react_agent.aget()
+            result = await agent.ainvoke({"messages": messages}, tool_config)
+            output = await _agent_output(result, llm)
+            sales_insights = output.get("sales_insights")
+            logger.debug("Sales analysis produced insights keys=%s", list(sales_insights or {}))
 
-Your responsibilities:
-- Use available tools to analyze sales patterns
-- Validate or refute sales-related hypotheses
+            internal_msgs = _internal_messages(result, len(messages))
+            tool_call_msgs = filter_tool_messages(internal_msgs)
 
-STRICT OUTPUT RULES:
-1. Output ONLY valid JSON
-2. Root JSON object MUST contain EXACTLY ONE key: "sales_insights"
-3. NO extra keys, commentary, or markdown
+            trace_entry = {
+                "agent": "SalesAnalysisAgent",
+                "step": "Validated sales hypotheses",
+                "calls": serialize_messages(tool_call_msgs),
+                "sales_insights": sales_insights,
+            }
 
-JSON schema:
-{{
-  "sales_insights": {{...}}
-}}
-""",
+            return {"sales_insights": sales_insights, "trace": [trace_entry]}
+
+        return await _with_semantic_cache(
+            semantic_cache, ("sales", user_id), messages, run, task, *sales_related_hypotheses
+        )
+
+    return sales_analysis_agent_tool
+
+
+def build_inventory_analysis_tool(
+    config: AppConfig, store, checkpointer, llm, load_inventory_tools: Callable[[], List[Any]], semantic_cache=None
+):
+    inventory_react_agent = _LazyAgent(
+        lambda: _create_react_agent(
+            "inventory",
+            config,
+            llm,
+            [*load_inventory_tools(), _manage_memory_tool("inventory"), _search_memory_tool("inventory")],
+            store,
+            checkpointer,
+            response_format=InventoryAnalysisOutput,
+        )
+    )
+
+    @tool
+    async def inventory_analysis_agent_tool(
+        task: str,
+        hypotheses: List[str],
+        user_id: str,
+        query_id: str,
+        memory_context: str,
+    ) -> Dict[str, Any]:
+        """
+        Purpose:
+            Analyze inventory movements, replenishments, transfers, and
+            adjustments to validate inventory-related RCA hypotheses.
+
+        When to use:
+            Use this tool when stock availability, shrinkage, replenishment
+            timing, transfers, or warehouse operations may contribute to
+            the observed problem.
+
+        Inputs:
+            - task (str): Resolved RCA task or problem statement
+            - hypotheses (List[str]): Candidate hypotheses to validate
+            - user_id (str): User/session identifier for scoped memory access
+            - query_id (str): Query/thread identifier
+            - memory_context (str): episodic + conversation memory
+
+        Output:
+            - dict:
+                - "inventory_insights": Structured inventory analysis
+        """
+        hypotheses = _dedupe_hypotheses(hypotheses)
+        logger.debug(
+            "Inventory analysis tool invoked user_id=%s query_id=%s hypotheses=%s",
+            user_id,
+            query_id,
+            len(hypotheses),
+        )
+        inventory_related_hypotheses = [h for h in hypotheses if INVENTORY_KEYWORDS_RE.search(h)]
+        if not inventory_related_hypotheses:
+            inventory_related_hypotheses = hypotheses
+
+        messages = [
+            _INVENTORY_SYSTEM_MESSAGE,
+            {
+                "role": "user",
+                "content": MEMORY_CONTEXT_TEMPLATE.format(memory_context=memory_context),
             },
             {
                 "role": "user",
-                "content": f"""
-Task: {task}
-Hypotheses: {sales_related_hypotheses}
-""",
+                "content": INVENTORY_USER_TEMPLATE.format(
+                    task=task, hypotheses=to_prompt_json(inventory_related_hypotheses)
+                ),
             },
         ]
 
-        tool_config = {"configurable": {"user_id": user_id, "thread_id": query_id}}
-        result = sales_react_agent.invoke({"messages": messages}, tool_config)
-        final_msg = result["messages"][-1].content
-        output = process_response(final_msg, llm=llm)
-        sales_insights = output.get("sales_insights")
-        logger.debug("Sales analysis produced insights keys=%s", list(sales_insights or {}))
-
-        internal_msgs = result["messages"][2:-1]
-        tool_call_msgs = filter_tool_messages(internal_msgs)
-
-        trace_entry = {
-            "agent": "SalesAnalysisAgent",
-            "step": "Validated sales hypotheses",
-            "calls": serialize_messages(tool_call_msgs),
-            "sales_insights": sales_insights,
-        }
-
-        return {"sales_insights": sales_insights, "trace": [trace_entry]}
-
-    return sales_analysis_agent_tool, sales_tools
-
+        async def run() -> Dict[str, Any]:
+            tool_config = {"configurable": {"user_id": user_id, "thread_id": f"{query_id}:inventory"}}
+            agent = await inventory_react_agent.aget()
+            result = await agent.ainvoke({"messages": messages}, tool_config)
+            output = await _agent_output(result, llm)
+            inventory_insights = output.get("inventory_insights")
+            logger.debug("Inventory analysis produced insights keys=%s", list(inventory_insights or {}))
+
+            internal_msgs = _internal_messages(result, len(messages))
+            tool_call_msgs = filter_tool_messages(internal_msgs)
+
+            trace_entry = {
+                "agent": "InventoryAnalysisAgent",
+                "step": "Validated inventory hypotheses",
+                "calls": serialize_messages(tool_call_msgs),
+                "inventory_insights": inventory_insights,
+            }
+
+            return {"inventory_insights": inventory_insights, "trace": [trace_entry]}
+
+        return await _with_semantic_cache(
+            semantic_cache,
+            ("inventory", user_id),
+            messages,
+            run,
+            task,
+            *inventory_related_hypotheses,
+        )
 
-def build_inventory_analysis_tool(
-    config: AppConfig, store, checkpointer, llm, inventory_tools, promo_tool
-):
-    inventory_tools = list(inventory_tools)
-    if promo_tool is not None:
-        inventory_tools = [promo_tool] + inventory_tools
-    inventory_tools += [
-        create_manage_memory_tool(namespace=("inventory", "{user_id}")),
-        create_search_memory_tool(namespace=("inventory", "{user_id}")),
-    ]
+    return inventory_analysis_agent_tool
 
-    inventory_react_agent = create_agent(
-        model=llm,
-        tools=inventory_tools,
-        middleware=[handle_tool_errors],
-        store=store,
-        checkpointer=checkpointer,
-    )
 
+def build_parallel_analysis_tool(config: AppConfig, sales_tool, inventory_tool):
     @tool
-    def inventory_analysis_agent_tool(
+    async def parallel_analysis_agent_tool(
         task: str,
         hypotheses: List[str],
         user_id: str,
@@ -280,13 +915,14 @@ def build_inventory_analysis_tool(
     ) -> Dict[str, Any]:
         """
         Purpose:
-            Analyze inventory movements, replenishments, transfers, and
-            adjustments to validate inventory-related RCA hypotheses.
+            Run the sales analysis and inventory analysis concurrently and
+            return both sets of insights in a single result.
 
         When to use:
-            Use this tool when stock availability, shrinkage, replenishment
-            timing, transfers, or warehouse operations may contribute to
-            the observed problem.
+            Use this tool after hypotheses have been generated when both
+            sales/promotion and inventory/replenishment factors need to be
+            analyzed. Prefer it over calling the sales and inventory analysis
+            tools one after the other.
 
         Inputs:
             - task (str): Resolved RCA task or problem statement
@@ -297,105 +933,63 @@ def build_inventory_analysis_tool(
 
         Output:
             - dict:
+                - "sales_insights": Structured sales analysis
                 - "inventory_insights": Structured inventory analysis
-                - "trace": Tool-call trace for observability
         """
         logger.debug(
-            "Inventory analysis tool invoked user_id=%s query_id=%s hypotheses=%s",
+            "Parallel analysis tool invoked user_id=%s query_id=%s hypotheses=%s concurrency=%s",
             user_id,
             query_id,
             len(hypotheses),
+            config.tool_concurrency_limit,
         )
-        inventory_related_hypotheses = [
-            h
-            for h in hypotheses
-            if any(
-                k in h.lower()
-                for k in [
-                    "inventory",
-                    "stock",
-                    "supply",
-                    "replenish",
-                    "transfer",
-                    "shrink",
-                    "adjust",
-                    "warehouse",
-                ]
-            )
-        ]
-        if not inventory_related_hypotheses:
-            inventory_related_hypotheses = hypotheses
-
-        messages = [
-            {
-                "role": "system",
-                "content": f"""
-You are the Inventory RCA Agent.
-
-Context (do not repeat, only use for reasoning):
-{memory_context}
+        tool_input = {
+            "task": task,
+            "hypotheses": hypotheses,
+            "user_id": user_id,
+            "query_id": query_id,
+            "memory_context": memory_context,
+        }
 
-Your responsibilities:
-- Analyze inventory levels, movements, transfers, adjustments, and replenishments
-- Use available tools via a ReAct loop
-- Produce structured insights
+        semaphore = asyncio.Semaphore(config.tool_concurrency_limit)
 
-STRICT OUTPUT RULES:
-1. Output ONLY valid JSON
-2. Root JSON object MUST contain EXACTLY ONE key: "inventory_insights"
-3. NO extra keys, markdown, or commentary
+        async def run_analysis(analysis_tool) -> Dict[str, Any]:
+            async with semaphore:
+                return await analysis_tool.ainvoke(tool_input)
 
-JSON schema:
-{{
-  "inventory_insights": {{...}}
-}}
-""",
-            },
-            {
-                "role": "user",
-                "content": f"""
-Task: {task}
-Hypotheses to validate: {inventory_related_hypotheses}
-""",
-            },
-        ]
+        sales_result, inventory_result = await asyncio.gather(
+            run_analysis(sales_tool), run_analysis(inventory_tool)
+        )
 
-        tool_config = {"configurable": {"user_id": user_id, "thread_id": query_id}}
-        result = inventory_react_agent.invoke({"messages": messages}, tool_config)
-        final_msg = result["messages"][-1].content
-        output = process_response(final_msg, llm=llm)
-        inventory_insights = output.get("inventory_insights")
-        logger.debug("Inventory analysis produced insights keys=%s", list(inventory_insights or {}))
-
-        internal_msgs = result["messages"][2:-1]
-        tool_call_msgs = filter_tool_messages(internal_msgs)
-
-        trace_entry = {
-            "agent": "InventoryAnalysisAgent",
-            "step": "Validated inventory hypotheses",
-            "calls": serialize_messages(tool_call_msgs),
-            "inventory_insights": inventory_insights,
+        # The analyses already recorded their own trace entries, if any are
+        # being collected; otherwise pass them through.
+        output = {
+            "sales_insights": sales_result.get("sales_insights"),
+            "inventory_insights": inventory_result.get("inventory_insights"),
         }
+        if "trace" in sales_result or "trace" in inventory_result:
+            output["trace"] = sales_result.get("trace", []) + inventory_result.get("trace", [])
+        return output
 
-        return {"inventory_insights": inventory_insights, "trace": [trace_entry]}
-
-    return inventory_analysis_agent_tool
+    return parallel_analysis_agent_tool
 
 
-def build_validation_tool(config: AppConfig, store, checkpointer, llm):
-    validation_react_agent = create_agent(
-        model=llm,
-        tools=[
-            create_manage_memory_tool(namespace=("hypothesis_validation", "{user_id}")),
-            create_search_memory_tool(namespace=("hypothesis_validation", "{user_id}")),
+def build_validation_tool(config: AppConfig, store, checkpointer, llm, semantic_cache=None):
+    validation_react_agent = _create_react_agent(
+        "hypothesis_validation",
+        config,
+        llm,
+        [
+            _manage_memory_tool("hypothesis_validation"),
+            _search_memory_tool("hypothesis_validation"),
         ],
-        middleware=[handle_tool_errors],
-        store=store,
-        checkpointer=checkpointer,
+        store,
+        checkpointer,
+        response_format=HypothesisValidationOutput,
     )
 
     @tool
-    def hypothesis_validation_agent_tool(
+    async def hypothesis_validation_agent_tool(
         hypotheses: List[str],
         sales_insights: Dict[str, Any],
         inventory_insights: Dict[str, Any],
@@ -427,85 +1021,153 @@ def build_validation_tool(config: AppConfig, store, checkpointer, llm):
             - dict:
                 - "validated": Mapping of hypothesis → true / false
                 - "reasoning": Mapping of hypothesis → explanation
-                - "trace": Tool-call trace for observability
         """
+        hypotheses = _dedupe_hypotheses(hypotheses)
         logger.debug(
             "Validation tool invoked user_id=%s query_id=%s hypotheses=%s",
             user_id,
             query_id,
             len(hypotheses),
         )
-        messages = [
-            {
-                "role": "system",
-                "content": """
-Validate each hypothesis using sales and inventory insights.
+        # Validate in small chunks concurrently: shorter prompts keep each
+        # call focused and wall-clock tracks the slowest chunk.
+        chunk_messages = [
+            [
+                _VALIDATION_SYSTEM_MESSAGE,
+                {
+                    "role": "user",
+                    "content": VALIDATION_USER_TEMPLATE.format(
+                        hypotheses=to_prompt_json(hypotheses[i : i + VALIDATION_CHUNK_SIZE]),
+                        sales_insights=to_prompt_json(sales_insights),
+                        inventory_insights=to_prompt_json(inventory_insights),
+                    ),
+                },
+            ]
+            for i in range(0, max(len(hypotheses), 1), VALIDATION_CHUNK_SIZE)
+        ]
+        semaphore = asyncio.Semaphore(config.tool_concurrency_limit)
+
+        async def validate_chunk(index: int, messages: List[Dict[str, Any]]):
+            # Chunks run side by side, so each needs its own checkpoint thread.
+            thread_id = query_id if len(chunk_messages) == 1 else f"{query_id}:validation:{index}"
+            tool_config = {"configurable": {"user_id": user_id, "thread_id": thread_id}}
+            async with semaphore:
+                result = await validation_react_agent.ainvoke({"messages": messages}, tool_config)
+            resp = await _agent_output(result, llm)
+            tool_call_msgs = filter_tool_messages(_internal_messages(result, len(messages)))
+            return resp, serialize_messages(tool_call_msgs)
+
+        async def run() -> Dict[str, Any]:
+            results = await asyncio.gather(
+                *(validate_chunk(index, messages) for index, messages in enumerate(chunk_messages))
+            )
+            validated: Dict[str, Any] = {}
+            reasoning: Dict[str, Any] = {}
+            calls: List[Dict[str, Any]] = []
+            for chunk_resp, chunk_calls in results:
+                validated.update(chunk_resp.get("validated") or {})
+                reasoning.update(chunk_resp.get("reasoning") or {})
+                calls.extend(chunk_calls)
+            resp = {"validated": validated, "reasoning": reasoning}
+            logger.debug(
+                "Validation tool returned validated keys=%s chunks=%s", list(validated), len(chunk_messages)
+            )
 
-STRICT OUTPUT RULES:
-1. Output ONLY valid JSON
-2. No markdown or code fences
-3. No extra fields or commentary
+            trace_entry = {
+                "agent": "HypothesisValidationAgent",
+                "step": "Validated hypotheses",
+                "calls": calls,
+                "details": resp,
+            }
+
+            return {"validated": validated, "reasoning": reasoning, "trace": [trace_entry]}
+
+        cache_messages = [_VALIDATION_SYSTEM_MESSAGE, *(messages[1] for messages in chunk_messages)]
+        return await _with_semantic_cache(
+            semantic_cache,
+            ("hypothesis_validation", user_id),
+            cache_messages,
+            run,
+            "\n".join(hypotheses),
+            *hypotheses,
+        )
 
-JSON schema:
-{
-  "validated": { "hypothesis": true | false },
-  "reasoning": { "hypothesis": "explanation" }
-}
-""",
-            },
-            {
-                "role": "user",
-                "content": f"""
-Hypotheses:
-{hypotheses}
+    return hypothesis_validation_agent_tool
 
-Sales insights:
-{sales_insights}
 
-Inventory insights:
-{inventory_insights}
-""",
-            },
-        ]
+def _trace_namespace(user_id: str) -> tuple[str, str]:
+    return ("trace", user_id)
 
-        tool_config = {"configurable": {"user_id": user_id, "thread_id": query_id}}
-        result = validation_react_agent.invoke({"messages": messages}, tool_config)
-        final_msg = result["messages"][-1].content
-        resp = process_response(final_msg, llm=llm)
-        logger.debug("Validation tool returned validated keys=%s", list((resp.get("validated") or {}).keys()))
 
-        internal_msgs = result["messages"][2:-1]
-        tool_call_msgs = filter_tool_messages(internal_msgs)
+def _summarize_trace(trace: List[Dict[str, Any]]) -> str:
+    entries = [entry for entry in trace if isinstance(entry, dict)]
+    if not entries:
+        return "No prior trace entries."
 
-        trace_entry = {
-            "agent": "HypothesisValidationAgent",
-            "step": "Validated hypotheses",
-            "calls": serialize_messages(tool_call_msgs),
-            "details": resp,
-        }
+    counts = Counter(entry.get("agent", "unknown") for entry in entries)
+    lines = [f"- {agent}: {count} entries" for agent, count in sorted(counts.items())]
+    root_causes = [
+        cause
+        for entry in entries
+        for cause in (entry.get("root_cause") or {}).get("primary_root_causes", [])
+    ]
+    if root_causes:
+        lines.append(f"Previously identified root causes: {to_prompt_json(root_causes)}")
+    return "\n".join(lines)
 
-        return {"validated": resp.get("validated"), "reasoning": resp.get("reasoning"), "trace": [trace_entry]}
 
-    return hypothesis_validation_agent_tool
+def build_root_cause_tool(config: AppConfig, store, checkpointer, llm, semantic_cache=None):
+    @tool
+    async def fetch_trace_section(query_id: str, agent: str, config: RunnableConfig) -> Dict[str, Any]:
+        """
+        Purpose:
+            Fetch the prior trace entries one agent recorded for an RCA query.
 
+        Inputs:
+            - query_id (str): Query/thread identifier
+            - agent (str): Agent name as listed in the trace summary
 
-def build_root_cause_tool(config: AppConfig, store, checkpointer, llm):
-    root_cause_react_agent = create_agent(
-        model=llm,
-        tools=[],
-        middleware=[handle_tool_errors],
-        store=store,
-        checkpointer=checkpointer,
+        Output:
+            - dict:
+                - "agent": The requested agent
+                - "entries": Trace entries recorded by that agent
+                - "available_agents": Agents present in the stored trace
+        """
+        user_id = config["configurable"]["user_id"]
+        item = await store.aget(_trace_namespace(user_id), query_id)
+        entries = item.value.get("entries", []) if item else []
+        section = [entry for entry in entries if entry.get("agent", "").lower() == agent.lower()]
+        logger.debug(
+            "Fetched trace section user_id=%s query_id=%s agent=%s entries=%s",
+            user_id,
+            query_id,
+            agent,
+            len(section),
+        )
+        return {
+            "agent": agent,
+            "entries": section,
+            "available_agents": sorted({entry.get("agent", "unknown") for entry in entries}),
+        }
+
+    root_cause_react_agent = _create_react_agent(
+        "root_cause",
+        config,
+        llm,
+        [fetch_trace_section],
+        store,
+        checkpointer,
+        response_format=RootCauseAnalysisOutput,
     )
 
     @tool
-    def root_cause_analysis_agent_tool(
+    async def root_cause_analysis_agent_tool(
         validated_hypotheses: Dict[str, bool],
         sales_insights: Dict[str, Any],
         inventory_insights: Dict[str, Any],
-        trace: List[Dict[str, Any]],
         user_id: str,
         query_id: str,
+        trace: Optional[List[Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
         """
         Purpose:
@@ -520,120 +1182,115 @@ def build_root_cause_tool(config: AppConfig, store, checkpointer, llm):
             - validated_hypotheses (dict): Hypothesis → true/false mapping
             - sales_insights (dict): Sales analysis output
             - inventory_insights (dict): Inventory analysis output
-            - trace (list): Prior agent trace entries
             - user_id (str): User/session identifier for scoped memory access
             - query_id (str): Query/thread identifier
+            - trace (list, optional): Prior agent trace entries. Leave empty
+              during an RCA run; the entries recorded by the earlier tools
+              are used. Stored for the agent to fetch by section, only a
+              summary is placed in the prompt
 
         Output:
             - dict:
                 - "root_cause": Final structured RCA
                 - "reasoning": Explanation of RCA decisions
-                - "trace": Tool-call trace for observability
         """
+        validated_hypotheses = {
+            h: validated_hypotheses[h] for h in _dedupe_hypotheses(validated_hypotheses)
+        }
+        if not trace:
+            trace = list(_RUN_TRACE.get() or [])
         logger.debug(
             "Root cause tool invoked user_id=%s query_id=%s validated_hypotheses=%s",
             user_id,
             query_id,
             len(validated_hypotheses),
         )
-        messages = [
-            {
-                "role": "system",
-                "content": """
-Produce a final Root Cause Analysis.
-
-Include:
-- primary root causes
-- supporting evidence
-- contributing factors
-- timeline
-- recommendations
-
-STRICT OUTPUT RULES:
-1. Output ONLY valid JSON
-2. No markdown or code fences
-3. No extra commentary
-4. JSON MUST contain EXACTLY two top-level keys:
-   - "root_cause"
-   - "reasoning"
+        if not any(validated_hypotheses.values()):
+            logger.info("No validated hypotheses for query_id=%s; skipping root cause analysis", query_id)
+            root_cause = RootCause(
+                primary_root_causes=[],
+                supporting_evidence={},
+                contributing_factors=[],
+                timeline=[],
+                recommendations=[],
+            ).model_dump()
+            reasoning = {
+                "primary_root_causes": "No hypothesis was supported by the sales and inventory evidence."
+            }
+            structured_trace_entry = {
+                "agent": "RootCauseAnalysisAgent",
+                "step": "Skipped root cause analysis (no validated hypotheses)",
+                "calls": [],
+                "root_cause": root_cause,
+            }
+            return _record_trace(
+                {"root_cause": root_cause, "reasoning": reasoning, "trace": [structured_trace_entry]}
+            )
 
-JSON schema:
-{
-  "root_cause": {
-    "primary_root_causes": ["string"],
-    "supporting_evidence": {
-      "sales": {},
-      "inventory": {},
-      "cross_analysis": {}
-    },
-    "contributing_factors": ["string"],
-    "timeline": [
-      { "date": "YYYY-MM-DD", "event": "string" }
-    ],
-    "recommendations": ["string"]
-  },
-  "reasoning": {
-    "primary_root_causes": "explanation",
-    "contributing_factors": "explanation",
-    "supporting_evidence": "explanation",
-    "timeline": "explanation",
-    "recommendations": "explanation"
-  }
-}
-""",
-            },
+        messages = [
+            _ROOT_CAUSE_SYSTEM_MESSAGE,
             {
                 "role": "user",
-                "content": f"""
-Validated hypotheses:
-{validated_hypotheses}
-
-Sales insights:
-{sales_insights}
-
-Inventory insights:
-{inventory_insights}
-
-Prior trace:
-{trace}
-""",
+                "content": ROOT_CAUSE_USER_TEMPLATE.format(
+                    validated_hypotheses=to_prompt_json(validated_hypotheses),
+                    sales_insights=to_prompt_json(sales_insights),
+                    inventory_insights=to_prompt_json(inventory_insights),
+                    query_id=query_id,
+                    trace_summary=_summarize_trace(trace),
+                ),
             },
         ]
 
-        tool_config = {"configurable": {"user_id": user_id, "thread_id": query_id}}
-        result = root_cause_react_agent.invoke({"messages": messages}, tool_config)
-        final_msg = result["messages"][-1].content
-        resp = process_response(final_msg, llm=llm)
-        root_cause = resp.get("root_cause")
-        reasoning = resp.get("reasoning")
-        logger.debug("Root cause tool generated root_cause=%s reasoning=%s", bool(root_cause), bool(reasoning))
-
-        internal_msgs = result["messages"][2:-1]
-        tool_call_msgs = filter_tool_messages(internal_msgs)
-
-        structured_trace_entry = {
-            "agent": "RootCauseAnalysisAgent",
-            "step": "Generated structured root cause",
-            "calls": serialize_messages(tool_call_msgs),
-            "root_cause": root_cause,
-        }
-
-        return {"root_cause": root_cause, "reasoning": reasoning, "trace": [structured_trace_entry]}
+        async def run() -> Dict[str, Any]:
+            await store.aput(
+                _trace_namespace(user_id),
+                query_id,
+                {"entries": [entry for entry in trace if isinstance(entry, dict)]},
+                index=False,
+            )
+            tool_config = {"configurable": {"user_id": user_id, "thread_id": query_id}}
+            result = await root_cause_react_agent.ainvoke({"messages": messages}, tool_config)
+            resp = await _agent_output(result, llm)
+            root_cause = resp.get("root_cause")
+            reasoning = resp.get("reasoning")
+            logger.debug("Root cause tool generated root_cause=%s reasoning=%s", bool(root_cause), bool(reasoning))
+
+            internal_msgs = _internal_messages(result, len(messages))
+            tool_call_msgs = filter_tool_messages(internal_msgs)
+
+            structured_trace_entry = {
+                "agent": "RootCauseAnalysisAgent",
+                "step": "Generated structured root cause",
+                "calls": serialize_messages(tool_call_msgs),
+                "root_cause": root_cause,
+            }
+
+            return {"root_cause": root_cause, "reasoning": reasoning, "trace": [structured_trace_entry]}
+
+        return await _with_semantic_cache(
+            semantic_cache,
+            ("root_cause", user_id),
+            messages,
+            run,
+            "\n".join(validated_hypotheses),
+            *(f"{h}={v}" for h, v in sorted(validated_hypotheses.items())),
+        )
 
     return root_cause_analysis_agent_tool
 
 
-def build_report_tool(config: AppConfig, store, checkpointer, llm):
-    rca_report_agent = create_agent(
-        model=llm,
-        tools=[],
-        middleware=[handle_tool_errors],
-        store=store,
-        checkpointer=checkpointer,
+def build_report_tool(config: AppConfig, store, checkpointer, llm, semantic_cache=None):
+    rca_report_agent = _create_react_agent(
+        "report",
+        config,
+        llm,
+        [],
+        store,
+        checkpointer,
     )
 
     @tool
-    def rca_report_agent_tool(
+    async def rca_report_agent_tool(
         root_cause: str, reasoning: str, user_id: str, query_id: str
     ) -> Dict[str, Any]:
         """
@@ -653,89 +1310,101 @@ def build_report_tool(config: AppConfig, store, checkpointer, llm):
         Output:
             - dict:
                 - "report_text": Human-readable RCA report
-                - "trace": Tool-call trace for observability
         """
         logger.debug(
             "Report tool invoked user_id=%s query_id=%s",
             user_id,
             query_id,
         )
-        report_messages = [
-            {
-                "role": "system",
-                "content": """
-You are an expert supply chain and demand planning analyst.
-
-Create a professional Root Cause Analysis Report.
-
-Audience:
-- Demand Planning
-- Inventory Management
-- Supply Chain Teams
-
-Requirements:
-- Clear structured sections
-- Bullet points where appropriate
-- No JSON, no code
-- Pure narrative report
-
-The report MUST include:
-- Executive Summary
-- Primary Root Cause(s)
-- Supporting Evidence
-- Contributing Factors
-- Key Data Points
-- Timeline of Events
-- Recommendations
-- Final Conclusion
+        # Report text is pushed to callers streaming the graph with
+        # stream_mode="custom" as it is generated.
+        write_stream = _stream_writer()
+        streamed = False
+
+        if not _has_root_cause(root_cause):
+            logger.info("No root cause identified for query_id=%s; skipping report generation", query_id)
+            report_text = NO_ROOT_CAUSE_REPORT_TEMPLATE.format(reasoning=reasoning or "None provided.")
+            report_trace_entry = {
+                "agent": "RootCauseAnalysisAgent",
+                "step": "Generated RCA report (no root cause identified)",
+                "report_text": report_text,
+            }
+            write_stream({"report_chunk": report_text})
+            return _record_trace({"report_text": report_text, "trace": [report_trace_entry]})
 
-Tone:
-Analytical, data-driven, formal, concise.
-""",
-            },
+        report_messages = [
+            _REPORT_SYSTEM_MESSAGE,
             {
                 "role": "user",
-                "content": f"""
-Use the following structured RCA output:
-
-{root_cause}
-{reasoning}
-""",
+                "content": REPORT_USER_TEMPLATE.format(root_cause=root_cause, reasoning=reasoning),
             },
         ]
 
-        tool_config = {"configurable": {"user_id": user_id, "thread_id": query_id}}
-        report_text = rca_report_agent.invoke(report_messages, tool_config).content
-        logger.debug("Report tool generated report length=%s", len(report_text))
-
-        report_trace_entry = {
-            "agent": "RootCauseAnalysisAgent",
-            "step": "Generated RCA report",
-            "report_text": report_text,
-        }
-
-        return {"report_text": report_text, "trace": [report_trace_entry]}
+        async def run() -> Dict[str, Any]:
+            nonlocal streamed
+            tool_config = {"configurable": {"user_id": user_id, "thread_id": query_id}}
+            chunks: List[str] = []
+            async for chunk, _ in rca_report_agent.astream(
+                {"messages": report_messages}, tool_config, stream_mode="messages"
+            ):
+                if isinstance(chunk, AIMessage) and chunk.content:
+                    chunks.append(chunk.content)
+                    write_stream({"report_chunk": chunk.content})
+            streamed = True
+            report_text = "".join(chunks)
+            logger.debug("Report tool generated report length=%s", len(report_text))
+
+            report_trace_entry = {
+                "agent": "RootCauseAnalysisAgent",
+                "step": "Generated RCA report",
+                "report_text": report_text,
+            }
+
+            return {"report_text": report_text, "trace": [report_trace_entry]}
+
+        output = await _with_semantic_cache(
+            semantic_cache, ("report", user_id), report_messages, run, root_cause, reasoning
+        )
+        if not streamed:
+            write_stream({"report_chunk": output["report_text"]})
+        return output
 
     return rca_report_agent_tool
 
 
 def build_router_agent(config: AppConfig, store, checkpointer, llm, tools):
-    logger.info("Building router agent with %s tools", len(tools))
-    return create_agent(
-        model=llm,
-        tools=tools,
-        middleware=[handle_tool_errors, TodoListMiddleware()],
-        store=store,
-        checkpointer=checkpointer,
+    logger.info(
+        "Building router agent with %s tools max_concurrency=%s",
+        len(tools),
+        config.tool_concurrency_limit,
+    )
+    return _create_react_agent(
+        "router",
+        config,
+        llm,
+        tools,
+        store,
+        checkpointer,
+        middleware=(handle_tool_errors, _TODO_MIDDLEWARE),
+        # Tool calls emitted in the same router turn run concurrently in the
+        # tool node; cap how many run at once.
+        max_concurrency=config.tool_concurrency_limit,
+        # build_agents makes fresh router tool closures on every call, but
+        # they only close over the config, llm, store and checkpointer that
+        # are already part of the key.
+        key_tools_by_name=True,
     )
 
 
-def orchestration_agent(rca_state: RCAState, config: Dict[str, Any], store, router_agent):
+async def orchestration_agent(rca_state: RCAState, config: Dict[str, Any], store, router_agent):
     if not rca_state.get("history"):
         rca_state["history"] = []
         logger.debug("Initialized empty history in RCA state")
 
-    memory_context = build_memory_augmented_prompt(
+    # Memory recall embeds the task and searches the store synchronously, so
+    # keep it off the event loop.
+    memory_context = await asyncio.to_thread(
+        cached_memory_augmented_prompt,
         query=rca_state["task"],
         state=rca_state,
         config=config,
@@ -744,75 +1413,15 @@ def orchestration_agent(rca_state: RCAState, config: Dict[str, Any], store, rout
     logger.debug("Memory context length=%s", len(memory_context))
 
     messages = [
+        _ORCHESTRATION_SYSTEM_MESSAGE,
         {
-            "role": "system",
-            "content": f"""
-You are a Deep Research Agent.
-
-Task: {rca_state["task"]}
-
-User Id: {config["configurable"]["user_id"]}
-
-Query Id: {config["configurable"]["thread_id"]}
-
-Use the following sementic abstract + procedural + episodic + conversation context:
-Memory Context(memory_context):'''{memory_context}'''
-
-Your role is to analyze the user's input, determine the appropriate
-research or response strategy, and use the available tools to resolve
-the request.
-
-The set of tools available to you may change dynamically.
-You must infer what each tool does from its description.
-
-------------------------------------------------------------
-CORE RESPONSIBILITIES:
-
-1. Understand User Intent
-  - The user input may be:
-    • a greeting or help request (e.g., "hi", "hello", "help")
-    • a general question
-    • a root cause analysis or supply chain investigation
-  - Do not assume the input is analytical.
-
-2. Decide the Level of Depth Required
-  - If the input can be addressed with a simple explanation or response,
-    prefer a lightweight approach.
-  - If the input requires investigation, reasoning, or analysis,
-    proceed with deep research behavior.
-
-3. Create an Internal Plan
-  - Before calling any tool, determine:
-    • what information is missing
-    • what needs to be discovered or generated
-    • whether memory or prior context is relevant
-  - The plan does not need to be shown unless required by a tool.
-
-4. Execute Using Tools
-  - Use the **todo's** tools to carry out the plan.
-  - Choose tools based on their descriptions, not their names.
-  - You may call multiple tools if necessary.
-  - Always prefer the minimal set of tool calls needed.
-
-5. RCA-Specific Behavior (when applicable)
-  - When the task involves diagnosing causes of a problem:
-    • avoid jumping to conclusions
-    • favor hypothesis generation before validation
-    • rely on state, memory, and evidence
-
-------------------------------------------------------------
-IMPORTANT RULES:
-
-- Do not hard-code assumptions about tool availability.
-- Do not invent tools or capabilities.
-- Do not answer complex questions directly in free text
-  if an appropriate tool exists.
-- Be robust to vague, short, or conversational user inputs.
-- Think first, then act through tools.
-
-You are expected to behave as a flexible, adaptive
-deep-research agent, not a fixed pipeline.
-""",
+            "role": "user",
+            "content": ORCHESTRATION_CONTEXT_TEMPLATE.format(
+                task=rca_state["task"],
+                user_id=config["configurable"]["user_id"],
+                query_id=config["configurable"]["thread_id"],
+                memory_context=memory_context,
+            ),
         },
         {"role": "user", "content": rca_state["task"]},
     ]
@@ -827,10 +1436,15 @@ deep-research agent, not a fixed pipeline.
         config["configurable"]["user_id"],
         config["configurable"]["thread_id"],
     )
-    result = router_agent.invoke({"messages": messages}, tool_config)
+    run_trace: List[Dict[str, Any]] = []
+    token = _RUN_TRACE.set(run_trace)
+    try:
+        result = await router_agent.ainvoke({"messages": messages}, tool_config)
+    finally:
+        _RUN_TRACE.reset(token)
     final_msg = result["messages"][-1].content
 
-    internal_msgs = result["messages"][2:-1]
+    internal_msgs = islice(result["messages"], len(messages), len(result["messages"]) - 1)
     tool_call_msgs = filter_tool_messages(internal_msgs)
 
     trace_entry = {
@@ -839,9 +1453,13 @@ deep-research agent, not a fixed pipeline.
     }
 
     rca_state["output"] = final_msg
-    rca_state["trace"] = trace_entry
+    rca_state["trace"] = [trace_entry, *run_trace]
     logger.info("Orchestration agent completed for user_id=%s", config["configurable"]["user_id"])
-    logger.debug("Orchestration agent tool call count=%s", len(trace_entry["tool_calls"]))
+    logger.debug(
+        "Orchestration agent tool call count=%s agent trace entries=%s",
+        len(trace_entry["tool_calls"]),
+        len(run_trace),
+    )
 
     append_rca_history(rca_state)
 
@@ -850,31 +1468,27 @@ deep-research agent, not a fixed pipeline.
 
 def build_agents(config: AppConfig, store, checkpointer):
     logger.info("Initializing RCA agents")
-    llm = get_llm_model(config)
-    hypothesis_tool = build_hypothesis_tool(config, store, checkpointer, llm)
-    salesforce_toolset = build_salesforce_toolset(config)
-    sap_toolset = build_sap_business_one_toolset(config)
-    tool_registry = ToolsetRegistry([salesforce_toolset, sap_toolset])
-    sales_tool, sales_tools = build_sales_analysis_tool(
-        config, store, checkpointer, llm, salesforce_toolset.tools
+    llm = _llm_for(config)
+    semantic_cache = _semantic_cache_for(config) if config.semantic_cache_enabled else None
+    hypothesis_tool = build_hypothesis_tool(config, store, checkpointer, llm, semantic_cache)
+    sales_tool = build_sales_analysis_tool(
+        config, store, checkpointer, llm, lambda: _sales_tools(config), semantic_cache
     )
-    try:
-        promo_tool = tool_registry.find_tool("get_promo_period")
-    except KeyError:
-        promo_tool = None
     inventory_tool = build_inventory_analysis_tool(
-        config, store, checkpointer, llm, sap_toolset.tools, promo_tool
+        config, store, checkpointer, llm, lambda: _inventory_tools(config), semantic_cache
     )
-    validation_tool = build_validation_tool(config, store, checkpointer, llm)
-    root_cause_tool = build_root_cause_tool(config, store, checkpointer, llm)
-    report_tool = build_report_tool(config, store, checkpointer, llm)
+    parallel_analysis_tool = build_parallel_analysis_tool(config, sales_tool, inventory_tool)
+    validation_tool = build_validation_tool(config, store, checkpointer, llm, semantic_cache)
+    root_cause_tool = build_root_cause_tool(config, store, checkpointer, llm, semantic_cache)
+    report_tool = build_report_tool(config, store, checkpointer, llm, semantic_cache)
 
     router_tools = [
-        create_search_memory_tool(namespace=("orchestration", "{user_id}")),
-        create_manage_memory_tool(namespace=("orchestration", "{user_id}")),
+        _search_memory_tool("orchestration"),
+        _manage_memory_tool("orchestration"),
         hypothesis_tool,
         sales_tool,
         inventory_tool,
+        parallel_analysis_tool,
         validation_tool,
         root_cause_tool,
         report_tool,
@@ -889,6 +1503,7 @@ def build_agents(config: AppConfig, store, checkpointer):
             "hypothesis": hypothesis_tool,
             "sales": sales_tool,
             "inventory": inventory_tool,
+            "parallel_analysis": parallel_analysis_tool,
             "validation": validation_tool,
             "root_cause": root_cause_tool,
             "report": report_tool,
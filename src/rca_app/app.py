@@ -2,14 +2,16 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 import logging
-from typing import Any, Dict
+from typing import Any, Callable, Dict
 
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph
 
 from .agents import build_agents, orchestration_agent
 from .config import AppConfig
 from .memory import setup_memory
 from .types import RCAState
+from .utils import run_sync
 
 logger = logging.getLogger(__name__)
 
@@ -33,11 +35,11 @@ def build_app(config: AppConfig) -> RCAApp:
     router_agent = agents["router_agent"]
     llm = agents["llm"]
 
+    async def orchestration_node(rca_state: RCAState, config: RunnableConfig) -> RCAState:
+        return await orchestration_agent(rca_state, config, store, router_agent)
+
     graph = StateGraph(RCAState)
-    graph.add_node(
-        "orchestration_agent",
-        lambda rca_state, config: orchestration_agent(rca_state, config, store, router_agent),
-    )
+    graph.add_node("orchestration_agent", orchestration_node)
     graph.set_entry_point("orchestration_agent")
     app = graph.compile(checkpointer=checkpointer, store=store)
 
@@ -52,13 +54,53 @@ def build_app(config: AppConfig) -> RCAApp:
     )
 
 
-def run_rca(app: RCAApp, task: str, user_id: str, query_id: str) -> Dict[str, Any]:
-    config = {"configurable": {"user_id": user_id, "thread_id": query_id}}
-    rca_state: RCAState = {
+def _initial_state(task: str) -> RCAState:
+    return {
         "task": task,
         "output": "",
         "trace": [],
     }
+
+
+async def arun_rca(app: RCAApp, task: str, user_id: str, query_id: str) -> Dict[str, Any]:
+    config = {"configurable": {"user_id": user_id, "thread_id": query_id}}
     logger.info("Running RCA for user_id=%s query_id=%s", user_id, query_id)
     logger.debug("RCA task length=%s", len(task))
-    return app.app.invoke(rca_state, config)
+    return await app.app.ainvoke(_initial_state(task), config)
+
+
+def run_rca(app: RCAApp, task: str, user_id: str, query_id: str) -> Dict[str, Any]:
+    """Synchronous wrapper around arun_rca."""
+    return run_sync(arun_rca(app, task, user_id, query_id))
+
+
+async def astream_rca(
+    app: RCAApp,
+    task: str,
+    user_id: str,
+    query_id: str,
+    on_report_chunk: Callable[[str], None],
+) -> Dict[str, Any]:
+    """Run an RCA like arun_rca, passing report text to on_report_chunk as it is generated."""
+    config = {"configurable": {"user_id": user_id, "thread_id": query_id}}
+    logger.info("Streaming RCA for user_id=%s query_id=%s", user_id, query_id)
+    # The report tool runs inside the router agent, so its custom events only
+    # reach the top-level stream with subgraphs=True.
+    async for _, payload in app.app.astream(
+        _initial_state(task), config, stream_mode="custom", subgraphs=True
+    ):
+        if "report_chunk" in payload:
+            on_report_chunk(payload["report_chunk"])
+    snapshot = await app.app.aget_state(config)
+    return snapshot.values
+
+
+def stream_rca(
+    app: RCAApp,
+    task: str,
+    user_id: str,
+    query_id: str,
+    on_report_chunk: Callable[[str], None],
+) -> Dict[str, Any]:
+    """Synchronous wrapper around astream_rca."""
+    return run_sync(astream_rca(app, task, user_id, query_id, on_report_chunk))
@@ -1,15 +1,14 @@
 from __future__ import annotations
 
 import argparse
-import json
+import asyncio
 import logging
 import os
 from pathlib import Path
 
-from .app import build_app
+import orjson
+
 from .config import load_config, resolve_data_dir
-from .memory import mark_memory_useful, semantic_recall
-from .memory_reflection import add_episodic_memory, add_procedural_memory, build_semantic_memory
 
 logger = logging.getLogger(__name__)
 
@@ -46,10 +45,34 @@ def configure_logging() -> Path:
     return log_file
 
 
-def run_chat():
-    config = load_config()
-    app = build_app(config)
-    logger.info("Starting RCA chat session")
+async def _persist_memories(app, last_state, last_config, user_input: str) -> None:
+    from .memory import mark_memory_useful, semantic_recall
+    from .memory_reflection import aadd_episodic_memory, aadd_procedural_memory, abuild_semantic_memory
+
+    user_id = last_config["configurable"]["user_id"]
+    logger.info("Persisting memories for user_id=%s", user_id)
+
+    async def reflect_on_episodes() -> None:
+        # Semantic memory is abstracted from episodes, including the one just
+        # stored, and recall should see the semantic memory it produced.
+        await aadd_episodic_memory(last_state, last_config, app.store, app.llm)
+        await abuild_semantic_memory(
+            user_id=user_id,
+            query=user_input,
+            store=app.store,
+            llm=app.llm,
+        )
+        used_semantic = await asyncio.to_thread(semantic_recall, last_state["task"], app.store, last_config)
+        mark_memory_useful(used_semantic)
+
+    await asyncio.gather(
+        reflect_on_episodes(),
+        aadd_procedural_memory(last_state, last_config, app.store, app.llm),
+    )
+
+
+async def _chat(app) -> None:
+    from .app import astream_rca
 
     print("\nRCA Chatbot (type 'exit' to quit)\n")
     default_user_id = "2"
@@ -64,35 +87,36 @@ def run_chat():
         query_id = default_query_id
 
         print("-" * 70)
-        user_input = input("You      : ").strip()
+        # Read input off the event loop so pooled client connections stay serviced.
+        user_input = (await asyncio.to_thread(input, "You      : ")).strip()
 
         if user_input.lower() in {"exit", "quit"}:
             if last_state and last_config:
-                logger.info("Persisting memories for user_id=%s", last_config["configurable"]["user_id"])
-                add_episodic_memory(last_state, last_config, app.store, app.llm)
-                build_semantic_memory(
-                    user_id=last_config["configurable"]["user_id"],
-                    query=user_input,
-                    store=app.store,
-                    llm=app.llm,
-                )
-                add_procedural_memory(last_state, last_config, app.store, app.llm)
-
-                used_semantic = semantic_recall(last_state["task"], app.store, last_config)
-                mark_memory_useful(used_semantic)
+                await _persist_memories(app, last_state, last_config, user_input)
 
             print("\nExiting RCA chatbot.")
             break
 
         config_dict = {"configurable": {"user_id": user_id, "thread_id": query_id}}
-        rca_state = {"task": user_input, "output": "", "trace": []}
 
         print("\n" + "-" * 70)
         print(" RCA Bot is thinking...")
         print("-" * 70)
 
-        rca_state = app.app.invoke(rca_state, config_dict)
+        report_started = False
+
+        def print_report_chunk(chunk: str) -> None:
+            nonlocal report_started
+            if not report_started:
+                print("\n RCA Report")
+                print("-" * 70)
+                report_started = True
+            print(chunk, end="", flush=True)
+
+        rca_state = await astream_rca(app, user_input, user_id, query_id, print_report_chunk)
         logger.info("RCA response generated")
+        if report_started:
+            print()
 
         print("\n RCA Bot Answer")
         print("-" * 70)
@@ -104,7 +128,21 @@ def run_chat():
         last_config = config_dict
 
 
+def run_chat():
+    # The agent stack (LangChain, LangGraph, OpenAI clients) is imported only
+    # by the commands that need it, keeping --help and the MCP servers fast.
+    from .app import build_app
+    from .utils import run_sync
+
+    config = load_config()
+    app = build_app(config)
+    logger.info("Starting RCA chat session")
+    run_sync(_chat(app))
+
+
 def inspect_memory():
+    from .app import build_app
+
     config = load_config()
     app = build_app(config)
     user_id = "2"
@@ -132,50 +170,63 @@ def inspect_memory():
             for m in memories
         ]
 
-    print(json.dumps(report, indent=2))
+    print(orjson.dumps(report, default=str, option=orjson.OPT_INDENT_2).decode())
     print("--------------------------------------------------------------------------")
 
 
+def _cmd_chat(args: argparse.Namespace) -> int:
+    run_chat()
+    return 0
+
+
+def _cmd_inspect_memory(args: argparse.Namespace) -> int:
+    inspect_memory()
+    return 0
+
+
+def _cmd_mcp_salesforce(args: argparse.Namespace) -> int:
+    from .mcp_servers import run_salesforce_mcp
+
+    run_salesforce_mcp(load_config(), host=args.host, port=args.port)
+    return 0
+
+
+def _cmd_mcp_sap(args: argparse.Namespace) -> int:
+    from .mcp_servers import run_sap_business_one_mcp
+
+    run_sap_business_one_mcp(load_config(), host=args.host, port=args.port)
+    return 0
+
+
 def main(argv: list[str] | None = None):
     configure_logging()
     parser = argparse.ArgumentParser(description="RCA project CLI")
     subparsers = parser.add_subparsers(dest="command")
 
-    subparsers.add_parser("chat", help="Start interactive RCA chat")
-    subparsers.add_parser("inspect-memory", help="Inspect stored memory")
+    chat_parser = subparsers.add_parser("chat", help="Start interactive RCA chat")
+    chat_parser.set_defaults(handler=_cmd_chat)
+    inspect_parser = subparsers.add_parser("inspect-memory", help="Inspect stored memory")
+    inspect_parser.set_defaults(handler=_cmd_inspect_memory)
     salesforce_parser = subparsers.add_parser(
         "mcp-salesforce", help="Run Sales MCP SSE server"
     )
     salesforce_parser.add_argument("--host", default="0.0.0.0")
     salesforce_parser.add_argument("--port", type=int, default=8600)
+    salesforce_parser.set_defaults(handler=_cmd_mcp_salesforce)
     sap_parser = subparsers.add_parser(
         "mcp-sap", help="Run Inventory MCP SSE server"
     )
     sap_parser.add_argument("--host", default="0.0.0.0")
     sap_parser.add_argument("--port", type=int, default=8700)
+    sap_parser.set_defaults(handler=_cmd_mcp_sap)
 
     args = parser.parse_args(argv)
 
-    if args.command == "chat":
-        run_chat()
-        return 0
-
-    if args.command == "inspect-memory":
-        inspect_memory()
-        return 0
-    if args.command == "mcp-salesforce":
-        from .mcp_servers import run_salesforce_mcp
-
-        run_salesforce_mcp(load_config(), host=args.host, port=args.port)
-        return 0
-    if args.command == "mcp-sap":
-        from .mcp_servers import run_sap_business_one_mcp
-
-        run_sap_business_one_mcp(load_config(), host=args.host, port=args.port)
-        return 0
-
-    parser.print_help()
-    return 1
+    handler = getattr(args, "handler", None)
+    if handler is None:
+        parser.print_help()
+        return 1
+    return handler(args)
 
 
 if __name__ == "__main__":
@@ -18,11 +18,21 @@ class AppConfig:
     data_dir: Path
     salesforce_mcp_url: str
     sap_mcp_url: str
+    tool_concurrency_limit: int = 2
+    llm_concurrency_limit: int = 4
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.90
+    semantic_cache_ttl_seconds: float = 86400.0
+    persist_checkpoints: bool = False
 
 
 DEFAULT_AZURE_API_VERSION = "2024-12-01-preview"
 DEFAULT_EMBEDDINGS_API_VERSION = "2023-05-15"
 DEFAULT_EMBEDDINGS_MODEL = "TxtEmbedAda002"
+DEFAULT_TOOL_CONCURRENCY_LIMIT = 2
+DEFAULT_LLM_CONCURRENCY_LIMIT = 4
+DEFAULT_SEMANTIC_CACHE_THRESHOLD = 0.90
+DEFAULT_SEMANTIC_CACHE_TTL_SECONDS = 24 * 60 * 60
 
 
 def resolve_data_dir() -> Path:
@@ -32,6 +42,13 @@ def resolve_data_dir() -> Path:
     return Path(__file__).resolve().parents[2] / "data"
 
 
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name, "").strip().lower()
+    if not value:
+        return default
+    return value not in {"0", "false", "no", "off"}
+
+
 def load_config() -> AppConfig:
     endpoint = os.getenv("AZURE_OPENAI_ENDPOINT", "").strip()
     api_key = os.getenv("AZURE_OPENAI_API_KEY", "").strip()
@@ -41,6 +58,20 @@ def load_config() -> AppConfig:
     embeddings_api_key = os.getenv("AZURE_OPENAI_EMBEDDINGS_API_KEY", api_key).strip()
     salesforce_mcp_url = os.getenv("RCA_MCP_SALESFORCE_URL", "http://localhost:8600").strip()
     sap_mcp_url = os.getenv("RCA_MCP_SAP_URL", "http://localhost:8700").strip()
+    tool_concurrency_limit = int(
+        os.getenv("RCA_TOOL_CONCURRENCY_LIMIT", str(DEFAULT_TOOL_CONCURRENCY_LIMIT))
+    )
+    llm_concurrency_limit = int(
+        os.getenv("RCA_LLM_CONCURRENCY_LIMIT", str(DEFAULT_LLM_CONCURRENCY_LIMIT))
+    )
+    semantic_cache_enabled = _env_flag("RCA_SEMANTIC_CACHE", True)
+    semantic_cache_threshold = float(
+        os.getenv("RCA_SEMANTIC_CACHE_THRESHOLD", str(DEFAULT_SEMANTIC_CACHE_THRESHOLD))
+    )
+    semantic_cache_ttl_seconds = float(
+        os.getenv("RCA_SEMANTIC_CACHE_TTL_SECONDS", str(DEFAULT_SEMANTIC_CACHE_TTL_SECONDS))
+    )
+    persist_checkpoints = _env_flag("RCA_PERSIST_CHECKPOINTS", False)
 
     return AppConfig(
         azure_openai_endpoint=endpoint,
@@ -54,4 +85,10 @@ def load_config() -> AppConfig:
         data_dir=resolve_data_dir(),
         salesforce_mcp_url=salesforce_mcp_url,
         sap_mcp_url=sap_mcp_url,
+        tool_concurrency_limit=max(1, tool_concurrency_limit),
+        llm_concurrency_limit=max(1, llm_concurrency_limit),
+        semantic_cache_enabled=semantic_cache_enabled,
+        semantic_cache_threshold=semantic_cache_threshold,
+        semantic_cache_ttl_seconds=semantic_cache_ttl_seconds,
+        persist_checkpoints=persist_checkpoints,
     )
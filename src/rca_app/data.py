@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 import logging
 import pandas as pd
@@ -17,17 +19,161 @@ def inventory_path(config: AppConfig) -> Path:
     return config.data_dir / "inventory_transactions.csv"
 
 
+# Low-cardinality label columns that the tools filter, group and merge on.
+CATEGORICAL_COLUMNS = ("store_id", "store_name", "product_id", "product_name", "transaction_type")
+
+
+@lru_cache(maxsize=8)
+def _read_transactions(path: Path, mtime_ns: int) -> pd.DataFrame:
+    # mtime_ns is part of the cache key so an edited CSV is re-read.
+    df = pd.read_csv(path, parse_dates=["transaction_date"])
+    categorical = [column for column in CATEGORICAL_COLUMNS if column in df.columns]
+    return df.astype(dict.fromkeys(categorical, "category"))
+
+
+def _load_transactions(path: Path) -> pd.DataFrame:
+    # Callers are free to mutate what they get back, so hand out a copy of
+    # the cached frame.
+    return _read_transactions(path, path.stat().st_mtime_ns).copy()
+
+
 def load_sales(config: AppConfig) -> pd.DataFrame:
     path = sales_path(config)
     logger.debug("Loading sales data from %s", path)
-    df = pd.read_csv(path, parse_dates=["transaction_date"])
-    logger.debug("Loaded sales data rows=%s columns=%s", len(df), list(df.columns))
+    df = _load_transactions(path)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Loaded sales data rows=%s columns=%s", len(df), list(df.columns))
     return df
 
 
 def load_inventory(config: AppConfig) -> pd.DataFrame:
     path = inventory_path(config)
     logger.debug("Loading inventory data from %s", path)
-    df = pd.read_csv(path, parse_dates=["transaction_date"])
-    logger.debug("Loaded inventory data rows=%s columns=%s", len(df), list(df.columns))
+    df = _load_transactions(path)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Loaded inventory data rows=%s columns=%s", len(df), list(df.columns))
     return df
+
+
+@lru_cache(maxsize=8)
+def _unique_store_ids(path: Path, mtime_ns: int) -> frozenset:
+    return frozenset(_read_transactions(path, mtime_ns)["store_id"].dropna().unique())
+
+
+def load_store_ids(config: AppConfig) -> list[str]:
+    """Sorted store_ids seen in either the sales or the inventory data."""
+    sales, inventory = sales_path(config), inventory_path(config)
+    return sorted(
+        _unique_store_ids(sales, sales.stat().st_mtime_ns)
+        | _unique_store_ids(inventory, inventory.stat().st_mtime_ns)
+    )
+
+
+@lru_cache(maxsize=8)
+def _store_names(path: Path, mtime_ns: int) -> pd.DataFrame:
+    return _read_transactions(path, mtime_ns)[["store_id", "store_name"]].drop_duplicates()
+
+
+def load_store_names(config: AppConfig) -> pd.DataFrame:
+    """Distinct store_id/store_name pairs of the sales data, in file order.
+
+    The frame is shared between calls and must be treated as read-only.
+    """
+    path = sales_path(config)
+    return _store_names(path, path.stat().st_mtime_ns)
+
+
+@dataclass(frozen=True)
+class InventoryViews:
+    """Row subsets of the inventory transactions that the MCP tools filter on.
+
+    The frames are shared between calls and must be treated as read-only.
+    The per-type frames are sorted by transaction_date (use
+    rows_in_date_range to select from them) and keep the original row
+    labels, so sort_index() restores file order.
+    """
+
+    receipts: pd.DataFrame
+    adjustments: pd.DataFrame
+    transfers: pd.DataFrame
+    delayed: pd.DataFrame
+    emergency: pd.DataFrame
+    # All rows, with the "NONE" destination placeholder turned into NA.
+    dest_normalized: pd.DataFrame
+
+
+@lru_cache(maxsize=128)
+def parse_date(value: str) -> pd.Timestamp:
+    """pd.to_datetime for tool date arguments, which agents tend to repeat."""
+    return pd.to_datetime(value)
+
+
+def _sorted_by_date(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values("transaction_date", kind="stable")
+
+
+def rows_in_date_range(
+    view: pd.DataFrame,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    *,
+    include_end: bool = True,
+) -> pd.DataFrame:
+    """Rows of a date-sorted view with start <= transaction_date <= end, in file order.
+
+    Bounds are found by binary search; with include_end=False the end bound
+    is exclusive.
+    """
+    dates = view["transaction_date"]
+    lo = 0 if start is None else dates.searchsorted(start, side="left")
+    hi = len(view) if end is None else dates.searchsorted(end, side="right" if include_end else "left")
+    return view.iloc[lo:hi].sort_index()
+
+
+@lru_cache(maxsize=8)
+def _build_inventory_views(path: Path, mtime_ns: int) -> InventoryViews:
+    df = _read_transactions(path, mtime_ns)
+    transaction_type = df["transaction_type"]
+    dest_normalized = df.copy()
+    dest_normalized["destination_location"] = dest_normalized["destination_location"].replace("NONE", pd.NA)
+    return InventoryViews(
+        receipts=_sorted_by_date(df[transaction_type == "RECEIPT"]),
+        adjustments=_sorted_by_date(df[transaction_type == "ADJUSTMENT"]),
+        transfers=_sorted_by_date(df[transaction_type == "TRANSFER"]),
+        delayed=df[df["notes"].str.contains("DELAYED", na=False, regex=False)],
+        emergency=df[df["notes"].str.contains("Emergency", na=False, regex=False)],
+        dest_normalized=dest_normalized,
+    )
+
+
+def load_inventory_views(config: AppConfig) -> InventoryViews:
+    path = inventory_path(config)
+    return _build_inventory_views(path, path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=16)
+def _table_records(path: Path, mtime_ns: int, view: str | None) -> list[dict]:
+    if view is None:
+        df = _read_transactions(path, mtime_ns)
+    else:
+        df = getattr(_build_inventory_views(path, mtime_ns), view).sort_index()
+    return df.to_dict(orient="records")
+
+
+def load_sales_records(config: AppConfig) -> list[dict]:
+    """All sales rows as records, built once per file version.
+
+    The list is shared between calls and must be treated as read-only.
+    """
+    path = sales_path(config)
+    return _table_records(path, path.stat().st_mtime_ns, None)
+
+
+def load_inventory_records(config: AppConfig, view: str | None = None) -> list[dict]:
+    """Inventory rows as records, in file order, built once per file version.
+
+    view names an InventoryViews field to serialize instead of the whole
+    table. The list is shared between calls and must be treated as read-only.
+    """
+    path = inventory_path(config)
+    return _table_records(path, path.stat().st_mtime_ns, view)
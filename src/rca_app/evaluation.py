@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+from dataclasses import dataclass, field
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, FrozenSet, Iterable, List, Tuple
 
-from .app import RCAApp, run_rca
+from .app import RCAApp, arun_rca, run_rca
+from .utils import run_sync
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_EVAL_CONCURRENCY = 5
+
 
 TOOL_TO_AGENT = {
     "hypothesis_agent_tool": "HypothesisAgent",
@@ -18,14 +22,25 @@ TOOL_TO_AGENT = {
     "write_todos": "OrchestrationAgent",
 }
 
+COMPOSITE_TOOL_AGENTS = {
+    "parallel_analysis_agent_tool": ("SalesAnalysisAgent", "InventoryAnalysisAgent"),
+}
 
-def flatten_trace(result: Dict[str, Any]) -> List[Dict[str, Any]]:
-    flat = []
+EVIDENCE_AGENTS = frozenset({"SalesAnalysisAgent", "InventoryAnalysisAgent"})
 
-    for msg in result.get("trace", []):
-        if msg.get("tool_calls"):
-            for call in msg["tool_calls"]:
-                agent = TOOL_TO_AGENT.get(call["name"], call["name"])
+
+def _flatten_step(msg: Dict[str, Any], flat: List[Dict[str, Any]]) -> None:
+    if msg.get("tool_calls"):
+        for call in msg["tool_calls"]:
+            if "type" in call:
+                # The orchestration entry lists the router's serialized
+                # messages under "tool_calls"; flatten each of them.
+                _flatten_step(call, flat)
+                continue
+            agents = COMPOSITE_TOOL_AGENTS.get(call["name"]) or (
+                TOOL_TO_AGENT.get(call["name"], call["name"]),
+            )
+            for agent in agents:
                 flat.append(
                     {
                         "agent": agent,
@@ -35,26 +50,64 @@ def flatten_trace(result: Dict[str, Any]) -> List[Dict[str, Any]]:
                     }
                 )
 
-        if msg.get("type") == "ToolMessage":
-            flat.append(
-                {
-                    "agent": "ToolResult",
-                    "content": msg.get("content"),
-                    "tool_call_id": msg.get("tool_call_id"),
-                }
-            )
+    if msg.get("type") == "ToolMessage":
+        flat.append(
+            {
+                "agent": "ToolResult",
+                "content": msg.get("content"),
+                "tool_call_id": msg.get("tool_call_id"),
+            }
+        )
+
+
+def flatten_trace(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    flat = []
+
+    for msg in result.get("trace", []):
+        _flatten_step(msg, flat)
 
     return flat
 
 
+def build_trace_index(trace: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Collect what the evaluators read from a trace in a single pass.
+
+    Matches extract_root_cause, extract_hypotheses, extract_validated and
+    flatten_trace: the first matching step wins for each field.
+    """
+    root_cause = hypotheses = validated = None
+    flat: List[Dict[str, Any]] = []
+
+    for step in trace:
+        agent = step.get("agent")
+        if hypotheses is None and agent == "HypothesisAgent":
+            hypotheses = step.get("hypotheses", [])
+        elif validated is None and agent == "HypothesisValidationAgent":
+            validated = step.get("details", {}).get("validated", {})
+        elif root_cause is None and agent == "RootCauseAnalysisAgent":
+            root_cause = step.get("root_cause")
+        _flatten_step(step, flat)
+
+    return {
+        "root_cause": root_cause if root_cause is not None else {},
+        "hypotheses": hypotheses if hypotheses is not None else [],
+        "validated": validated if validated is not None else {},
+        "flat": flat,
+    }
+
+
 def extract_root_cause(result: Dict[str, Any]) -> Dict[str, Any]:
+    # The report step is also logged as RootCauseAnalysisAgent, without a root_cause.
     for step in result.get("trace", []):
-        for call in step.get("tool_calls", []):
-            if call.get("name") == "root_cause_analysis_agent_tool":
-                return call.get("output", {})
+        if step.get("agent") == "RootCauseAnalysisAgent" and step.get("root_cause") is not None:
+            return step["root_cause"]
     return {}
 
 
+def normalize(text: str) -> str:
+    return text.lower().strip()
+
+
 @dataclass
 class GoldRCACase:
     case_id: str
@@ -63,6 +116,17 @@ class GoldRCACase:
     gold_hypotheses: List[str]
     must_use_agents: List[str]
     forbidden_root_causes: List[str]
+    # Normalized copies built once per case rather than on every evaluation.
+    _required_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    _expected_norm: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    _hypotheses_norm: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    _forbidden_norm: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._required_set = frozenset(self.must_use_agents)
+        self._expected_norm = tuple(map(normalize, self.expected_root_causes))
+        self._hypotheses_norm = tuple(map(normalize, self.gold_hypotheses))
+        self._forbidden_norm = tuple(map(normalize, self.forbidden_root_causes))
 
 
 GOLD_RCA_DATASET: List[GoldRCACase] = [
@@ -110,63 +174,56 @@ class EvalScores:
     forbidden_penalty: bool
 
 
-def normalize(text: str) -> str:
-    return text.lower().strip()
-
-
 def semantic_match(a: str, b: str) -> bool:
     a, b = normalize(a), normalize(b)
     return a in b or b in a
 
 
+def _count_normalized_matches(predicted_norm: Iterable[str], gold_norm: Iterable[str]) -> int:
+    predicted_norm = tuple(predicted_norm)
+    return sum(1 for g in gold_norm if any(p in g or g in p for p in predicted_norm))
+
+
 def count_semantic_matches(predicted: List[str], gold: List[str]) -> int:
-    count = 0
-    for g in gold:
-        if any(semantic_match(p, g) for p in predicted):
-            count += 1
-    return count
+    return _count_normalized_matches(map(normalize, predicted), map(normalize, gold))
 
 
-def check_process_order(trace: List[Dict[str, Any]], required_agents: List[str]) -> bool:
+def check_process_order(trace: List[Dict[str, Any]], required_agents: Iterable[str]) -> bool:
     executed = {t["agent"] for t in trace}
-    return all(agent in executed for agent in required_agents)
+    return executed.issuperset(required_agents)
 
 
 def evidence_backed(validated: Dict[str, bool], trace: List[Dict[str, Any]]) -> float:
     if not validated:
         return 0.0
 
-    evidence_agents = {"SalesAnalysisAgent", "InventoryAnalysisAgent"}
-    used_agents = {t["agent"] for t in trace}
-    has_evidence = evidence_agents.intersection(used_agents)
+    if EVIDENCE_AGENTS.isdisjoint(t["agent"] for t in trace):
+        return 0.0
 
-    supported = sum(1 for v in validated.values() if v and has_evidence)
+    supported = sum(map(bool, validated.values()))
 
     return supported / max(len(validated), 1)
 
 
 def evaluate_single_case(gold: GoldRCACase, rca_output: Dict[str, Any]) -> EvalScores:
-    trace = flatten_trace(rca_output)
+    trace = rca_output["flat"] if "flat" in rca_output else flatten_trace(rca_output)
     root_causes = rca_output["root_cause"]["primary_root_causes"]
     hypotheses = rca_output.get("hypotheses", [])
     validated = rca_output.get("validated", {})
 
-    matched = count_semantic_matches(root_causes, gold.expected_root_causes)
+    root_causes_norm = tuple(map(normalize, root_causes))
+    matched = _count_normalized_matches(root_causes_norm, gold._expected_norm)
     precision = matched / max(len(root_causes), 1)
     recall = matched / max(len(gold.expected_root_causes), 1)
 
-    coverage = count_semantic_matches(hypotheses, gold.gold_hypotheses)
+    coverage = _count_normalized_matches(map(normalize, hypotheses), gold._hypotheses_norm)
     hypothesis_coverage = coverage / max(len(gold.gold_hypotheses), 1)
 
     evidence = evidence_backed(validated, trace)
 
-    process_ok = check_process_order(trace, gold.must_use_agents)
+    process_ok = check_process_order(trace, gold._required_set)
 
-    forbidden_penalty = any(
-        semantic_match(rc, f)
-        for rc in root_causes
-        for f in gold.forbidden_root_causes
-    )
+    forbidden_penalty = _count_normalized_matches(root_causes_norm, gold._forbidden_norm) > 0
 
     return EvalScores(
         precision=precision,
@@ -202,48 +259,75 @@ def extract_validated(result: Dict[str, Any]) -> Dict[str, Any]:
     return {}
 
 
-def run_rca_with_memory(app: RCAApp, task: str) -> Dict[str, Any]:
+def _indexed_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    trace = normalize_trace(result.get("trace"))
+    return {**build_trace_index(trace), "trace": trace}
+
+
+async def arun_rca_with_memory(app: RCAApp, task: str) -> Dict[str, Any]:
     config = {"configurable": {"user_id": "eval_user", "thread_id": "eval_thread", "memory_enabled": True}}
     rca_state = {"task": task, "output": "", "trace": []}
     logger.info("Running RCA evaluation with memory")
-    result = app.app.invoke(rca_state, config)
-    normalized_trace = normalize_trace(result.get("trace"))
-    return {
-        "root_cause": extract_root_cause({"trace": normalized_trace}),
-        "hypotheses": extract_hypotheses({"trace": normalized_trace}),
-        "validated": extract_validated({"trace": normalized_trace}),
-        "trace": normalized_trace,
-    }
+    return _indexed_result(await app.app.ainvoke(rca_state, config))
 
 
-def run_rca_without_memory(app: RCAApp, task: str) -> Dict[str, Any]:
+async def arun_rca_without_memory(app: RCAApp, task: str) -> Dict[str, Any]:
     config = {
         "configurable": {"user_id": "eval_user_nomem", "thread_id": "eval_thread_nomem", "memory_enabled": False}
     }
     empty_state = {"task": task, "output": "", "trace": []}
     logger.info("Running RCA evaluation without memory")
-    result = app.app.invoke(empty_state, config)
-    return {
-        "root_cause": extract_root_cause(result),
-        "hypotheses": extract_hypotheses(result),
-        "validated": extract_validated(result),
-        "trace": result.get("trace", []),
-    }
+    result = await app.app.ainvoke(empty_state, config)
+    trace = result.get("trace", [])
+    return {**build_trace_index(trace), "trace": trace}
 
 
-def run_memory_ablation(app: RCAApp, case: GoldRCACase) -> Dict[str, EvalScores]:
-    out_mem = run_rca_with_memory(app, case.task)
-    out_nomem = run_rca_without_memory(app, case.task)
+def run_rca_with_memory(app: RCAApp, task: str) -> Dict[str, Any]:
+    return run_sync(arun_rca_with_memory(app, task))
+
+
+def run_rca_without_memory(app: RCAApp, task: str) -> Dict[str, Any]:
+    return run_sync(arun_rca_without_memory(app, task))
+
+
+async def arun_memory_ablation(app: RCAApp, case: GoldRCACase) -> Dict[str, EvalScores]:
+    # The two runs use different users and threads, so they can overlap.
+    out_mem, out_nomem = await asyncio.gather(
+        arun_rca_with_memory(app, case.task),
+        arun_rca_without_memory(app, case.task),
+    )
     return {
         "with_memory": evaluate_single_case(case, out_mem),
         "without_memory": evaluate_single_case(case, out_nomem),
     }
 
 
+def run_memory_ablation(app: RCAApp, case: GoldRCACase) -> Dict[str, EvalScores]:
+    return run_sync(arun_memory_ablation(app, case))
+
+
 def learning_curve(app: RCAApp, cases: List[GoldRCACase]) -> List[float]:
     recalls = []
     for c in cases:
-        out = run_rca(app, c.task, user_id="eval_user", query_id="eval_thread")
+        out = _indexed_result(run_rca(app, c.task, user_id="eval_user", query_id="eval_thread"))
         score = evaluate_single_case(c, out)
         recalls.append(score.recall)
     return recalls
+
+
+async def alearning_curve(
+    app: RCAApp, cases: List[GoldRCACase], max_concurrent: int = DEFAULT_EVAL_CONCURRENCY
+) -> List[float]:
+    """Score cases concurrently, at most max_concurrent at a time.
+
+    Unlike learning_curve, every case runs on its own checkpoint thread, so
+    cases don't see each other's conversation history.
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def run_case(case: GoldRCACase) -> float:
+        async with semaphore:
+            out = await arun_rca(app, case.task, user_id="eval_user", query_id=f"eval_thread:{case.case_id}")
+        return evaluate_single_case(case, _indexed_result(out)).recall
+
+    return list(await asyncio.gather(*(run_case(c) for c in cases)))
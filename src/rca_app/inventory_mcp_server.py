@@ -6,7 +6,15 @@ from mcp.server.fastmcp import FastMCP
 import pandas as pd
 
 from .config import AppConfig
-from .data import load_inventory, load_sales
+from .data import (
+    load_inventory_records,
+    load_inventory_views,
+    load_sales,
+    load_store_ids,
+    load_store_names,
+    parse_date,
+    rows_in_date_range,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -27,18 +35,12 @@ def get_unique_stores() -> dict:
     """Return list of unique store_ids from sales and inventory timeline."""
     logger.debug("get_unique_stores invoked")
     config = _get_config()
-    sales_df = load_sales(config)
-    inv_df = load_inventory(config)
-    stores = sorted(pd.concat([sales_df["store_id"], inv_df["store_id"]]).dropna().unique())
+    stores = load_store_ids(config)
     result = {"stores": stores}
     logger.debug("get_unique_stores returning %s stores", len(stores))
     return result
 
 
-def drop_store_name(df):
-    return df.drop(columns=["store_name"], errors="ignore")
-
-
 @inventory_mcp_server.tool()
 def theoretical_onhand_after_promo_sales(promo_start: str, promo_end: str):
     """
@@ -52,72 +54,53 @@ def theoretical_onhand_after_promo_sales(promo_start: str, promo_end: str):
     )
     config = _get_config()
     sales = load_sales(config)
-    inv = load_inventory(config)
-    promo_start_dt = pd.to_datetime(promo_start)
-    promo_end_dt = pd.to_datetime(promo_end)
+    inv = load_inventory_views(config).dest_normalized
+    promo_start_dt = parse_date(promo_start)
+    promo_end_dt = parse_date(promo_end)
 
     as_of = promo_start_dt - pd.Timedelta(days=1)
 
-    inv_receipts_before = inv[
-        (inv["transaction_date"] <= as_of)
-        & (inv["transaction_type"] == "RECEIPT")
-    ]
-
-    start_inv = (
-        inv_receipts_before.groupby("destination_location", as_index=False)["quantity"]
-        .sum()
-        .rename(
-            columns={
-                "destination_location": "store_id",
-                "quantity": "start_receipt_qty",
-            }
-        )
-    )
-
-    inv_changes = inv[inv["transaction_date"] > as_of].copy()
-    inv_changes["destination_location"] = inv_changes["destination_location"].replace(
-        "NONE", pd.NA
-    )
-    inv_changes["target_store"] = inv_changes["destination_location"].fillna(
-        inv_changes["store_id"]
-    )
-
-    inv_net_after = (
-        inv_changes.groupby("target_store", as_index=False)["quantity"]
-        .sum()
-        .rename(columns={"target_store": "store_id", "quantity": "net_qty_after"})
-    )
-
-    promo_repl = inv[
-        (inv["transaction_date"] == promo_start_dt)
-        & (inv["transaction_type"] == "RECEIPT")
-    ]
-
-    promo_repl_by_store = (
-        promo_repl.groupby("destination_location", as_index=False)["quantity"]
-        .sum()
-        .rename(columns={"destination_location": "store_id", "quantity": "promo_repl_qty"})
+    # The three inventory contributions are summed in a single groupby over
+    # the receiving store. Receipts count toward their (present) destination;
+    # every later movement counts toward its destination, else its store.
+    dates = inv["transaction_date"]
+    is_receipt = (inv["transaction_type"] == "RECEIPT") & inv["destination_location"].notna()
+    masks = {
+        "start_receipt_qty": is_receipt & (dates <= as_of),
+        "net_qty_after": dates > as_of,
+        "promo_repl_qty": is_receipt & (dates == promo_start_dt),
+    }
+    contributions = pd.DataFrame(
+        {
+            **{column: inv["quantity"].where(mask, 0) for column, mask in masks.items()},
+            **{f"{column}_rows": mask for column, mask in masks.items()},
+        }
     )
+    target_store = inv["destination_location"].fillna(inv["store_id"]).rename("store_id")
+    totals = contributions.groupby(target_store, observed=True).sum()
 
     promo_sales = sales[
         (sales["transaction_date"] >= promo_start_dt)
         & (sales["transaction_date"] <= promo_end_dt)
     ]
-
-    promo_by_store = (
-        promo_sales.groupby(["store_id", "store_name"], as_index=False)["quantity_sold"]
-        .sum()
-        .rename(columns={"quantity_sold": "promo_qty_sold"})
+    promo_by_store = promo_sales.groupby("store_id", observed=True)["quantity_sold"].sum()
+
+    # Per-store results are aligned to the sales stores by reindexing rather
+    # than merged; missing stores come out NaN and then 0, as with a left merge.
+    summary = load_store_names(config).reset_index(drop=True)
+    store_ids = summary["store_id"]
+    aligned = totals.reindex(store_ids)
+    start_receipt_qty, net_qty_after, promo_repl_qty = (
+        aligned[column].where(aligned[f"{column}_rows"] > 0).to_numpy() for column in masks
     )
-
-    stores = sales[["store_id", "store_name"]].drop_duplicates()
-
-    summary = (
-        stores.merge(drop_store_name(start_inv), on="store_id", how="left")
-        .merge(drop_store_name(inv_net_after), on="store_id", how="left")
-        .merge(drop_store_name(promo_by_store), on="store_id", how="left")
-        .merge(drop_store_name(promo_repl_by_store), on="store_id", how="left")
-    ).fillna(0)
+    quantities = {
+        "start_receipt_qty": start_receipt_qty,
+        "net_qty_after": net_qty_after,
+        "promo_qty_sold": promo_by_store.reindex(store_ids).to_numpy(),
+        "promo_repl_qty": promo_repl_qty,
+    }
+    # Only the quantity columns are filled; the store columns are categorical.
+    summary = summary.assign(**quantities).fillna(dict.fromkeys(quantities, 0))
 
     summary["theoretical_after_changes"] = (
         summary["start_receipt_qty"] + summary["net_qty_after"]
@@ -140,32 +123,31 @@ def get_daily_inventory_for_store(store_id: str):
     """
     logger.debug("get_daily_inventory_for_store invoked store_id=%s", store_id)
     config = _get_config()
-    inv = load_inventory(config)
+    inv = load_inventory_views(config).dest_normalized
     sales = load_sales(config)
 
-    inv["destination_location"] = inv["destination_location"].replace("NONE", pd.NA)
-    inv["store"] = inv["store_id"]
+    # Only the requested store's timeline is returned, so filter before
+    # grouping and take a plain cumulative sum over its dates.
+    inv = inv[inv["store_id"] == store_id]
+    sales = sales[sales["store_id"] == store_id]
 
-    daily_inv_moves = (
-        inv.groupby(["transaction_date", "store"], as_index=False)["quantity"].sum()
-    )
+    daily_inv_moves = inv.groupby("transaction_date", as_index=False)["quantity"].sum()
+    daily_sales = sales.groupby("transaction_date", as_index=False)["quantity_sold"].sum()
 
-    daily_sales = (
-        sales.groupby(["transaction_date", "store_id"], as_index=False)["quantity_sold"]
-        .sum()
-        .rename(columns={"store_id": "store"})
+    # Quantities stay float, as they were when the outer merge across all
+    # stores left gaps to fill.
+    timeline = (
+        pd.merge(daily_inv_moves, daily_sales, on="transaction_date", how="outer")
+        .fillna(0)
+        .astype({"quantity": float, "quantity_sold": float})
     )
-
-    timeline = pd.merge(
-        daily_inv_moves, daily_sales, on=["transaction_date", "store"], how="outer"
-    ).fillna(0)
+    timeline.insert(1, "store", store_id)
 
     timeline["net_change"] = timeline["quantity"] - timeline["quantity_sold"]
-    timeline = timeline.sort_values(["store", "transaction_date"])
-    timeline["running_inventory"] = timeline.groupby("store")["net_change"].cumsum()
+    timeline = timeline.sort_values("transaction_date")
+    timeline["running_inventory"] = timeline["net_change"].to_numpy().cumsum()
 
-    result = timeline[timeline["store"] == store_id]
-    records = result.to_dict(orient="records")
+    records = timeline.to_dict(orient="records")
     logger.debug("get_daily_inventory_for_store returning %s records", len(records))
     return records
 
@@ -175,9 +157,7 @@ def get_adjustments():
     """Return all shrinkage/adjustment rows."""
     logger.debug("get_adjustments invoked")
     config = _get_config()
-    df = load_inventory(config)
-    adjustments = df[df["transaction_type"] == "ADJUSTMENT"]
-    records = adjustments.to_dict(orient="records")
+    records = load_inventory_records(config, "adjustments")
     logger.debug("get_adjustments returning %s records", len(records))
     return records
 
@@ -187,12 +167,9 @@ def get_shrinkage_before_promo(promo_start: str):
     """Return shrinkage rows before promo start."""
     logger.debug("get_shrinkage_before_promo invoked promo_start=%s", promo_start)
     config = _get_config()
-    df = load_inventory(config)
-    promo_start_dt = pd.to_datetime(promo_start)
-    result = df[
-        (df["transaction_type"] == "ADJUSTMENT")
-        & (df["transaction_date"] < promo_start_dt)
-    ]
+    adjustments = load_inventory_views(config).adjustments
+    promo_start_dt = parse_date(promo_start)
+    result = rows_in_date_range(adjustments, end=promo_start_dt, include_end=False)
     records = result.to_dict(orient="records")
     logger.debug("get_shrinkage_before_promo returning %s records", len(records))
     return records
@@ -207,14 +184,10 @@ def get_shrinkage_during_promo(promo_start: str, promo_end: str):
         promo_end,
     )
     config = _get_config()
-    df = load_inventory(config)
-    promo_start_dt = pd.to_datetime(promo_start)
-    promo_end_dt = pd.to_datetime(promo_end)
-    result = df[
-        (df["transaction_type"] == "ADJUSTMENT")
-        & (df["transaction_date"] >= promo_start_dt)
-        & (df["transaction_date"] <= promo_end_dt)
-    ]
+    adjustments = load_inventory_views(config).adjustments
+    promo_start_dt = parse_date(promo_start)
+    promo_end_dt = parse_date(promo_end)
+    result = rows_in_date_range(adjustments, promo_start_dt, promo_end_dt)
     records = result.to_dict(orient="records")
     logger.debug("get_shrinkage_during_promo returning %s records", len(records))
     return records
@@ -225,8 +198,7 @@ def get_delayed_replenishments():
     """Return all inventory rows with DELAYED note."""
     logger.debug("get_delayed_replenishments invoked")
     config = _get_config()
-    df = load_inventory(config)
-    delayed = df[df["notes"].str.contains("DELAYED", na=False)]
+    delayed = load_inventory_views(config).delayed
     records = delayed.to_dict(orient="records")
     logger.debug("get_delayed_replenishments returning %s records", len(records))
     return records
@@ -237,12 +209,9 @@ def get_promo_replenishment_for_date(date: str):
     """Return receipts for given date."""
     logger.debug("get_promo_replenishment_for_date invoked date=%s", date)
     config = _get_config()
-    df = load_inventory(config)
-    date_dt = pd.to_datetime(date)
-    promo_repl = df[
-        (df["transaction_date"] == date_dt)
-        & (df["transaction_type"] == "RECEIPT")
-    ]
+    receipts = load_inventory_views(config).receipts
+    date_dt = parse_date(date)
+    promo_repl = rows_in_date_range(receipts, date_dt, date_dt)
     records = promo_repl.to_dict(orient="records")
     logger.debug("get_promo_replenishment_for_date returning %s records", len(records))
     return records
@@ -253,9 +222,7 @@ def get_all_transfers():
     """Return all transfer rows."""
     logger.debug("get_all_transfers invoked")
     config = _get_config()
-    df = load_inventory(config)
-    transfers = df[df["transaction_type"] == "TRANSFER"]
-    records = transfers.to_dict(orient="records")
+    records = load_inventory_records(config, "transfers")
     logger.debug("get_all_transfers returning %s records", len(records))
     return records
 
@@ -265,12 +232,9 @@ def get_transfers_for_date(date: str):
     """Return transfers for a given date."""
     logger.debug("get_transfers_for_date invoked date=%s", date)
     config = _get_config()
-    df = load_inventory(config)
-    date_dt = pd.to_datetime(date)
-    result = df[
-        (df["transaction_type"] == "TRANSFER")
-        & (df["transaction_date"] == date_dt)
-    ]
+    transfers = load_inventory_views(config).transfers
+    date_dt = parse_date(date)
+    result = rows_in_date_range(transfers, date_dt, date_dt)
     records = result.to_dict(orient="records")
     logger.debug("get_transfers_for_date returning %s records", len(records))
     return records
@@ -281,8 +245,7 @@ def get_emergency_receipts():
     """Return emergency receipts."""
     logger.debug("get_emergency_receipts invoked")
     config = _get_config()
-    df = load_inventory(config)
-    emergency = df[df["notes"].str.contains("Emergency", na=False)]
+    emergency = load_inventory_views(config).emergency
     records = emergency.to_dict(orient="records")
     logger.debug("get_emergency_receipts returning %s records", len(records))
     return records
@@ -293,8 +256,7 @@ def get_inventory_data():
     """Return inventory movements as list of dicts."""
     logger.debug("get_inventory_data invoked")
     config = _get_config()
-    df = load_inventory(config)
-    records = df.to_dict(orient="records")
+    records = load_inventory_records(config)
     logger.debug("get_inventory_data returning %s records", len(records))
     return records
 
@@ -1,13 +1,73 @@
 from __future__ import annotations
 
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
 import logging
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+from langchain_core.embeddings import Embeddings
 from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
 
 from .config import AppConfig
 
 logger = logging.getLogger(__name__)
 
+# Agents fan out concurrently, so keep enough idle connections around to
+# reuse them instead of opening a new TLS session per request.
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+
+class LoopLocalTransport(httpx.AsyncBaseTransport):
+    """Async transport that keeps a separate connection pool per event loop.
+
+    Pooled async connections are bound to the loop that opened them, while
+    the chat model and embeddings are shared by every loop in the process
+    (each run_sync thread, the CLI loop). Pools of loops that have since
+    closed are dropped on the next request.
+    """
+
+    def __init__(self, limits: httpx.Limits) -> None:
+        self.limits = limits
+        self._transports: Dict[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport] = {}
+        self._lock = threading.Lock()
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                for closed in [other for other in self._transports if other.is_closed()]:
+                    del self._transports[closed]
+                transport = self._transports[loop] = httpx.AsyncHTTPTransport(limits=self.limits)
+            return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.pop(loop, None)
+        if transport is not None:
+            await transport.aclose()
+
 
+@lru_cache(maxsize=1)
+def _http_clients() -> Dict[str, httpx.Client | httpx.AsyncClient]:
+    # Shared by the chat model and the embeddings: both usually talk to the
+    # same Azure resource, so they can reuse each other's connections.
+    return {
+        "http_client": httpx.Client(limits=HTTP_LIMITS),
+        "http_async_client": httpx.AsyncClient(transport=LoopLocalTransport(HTTP_LIMITS)),
+    }
+
+
+@lru_cache(maxsize=4)
 def get_llm_model(config: AppConfig) -> AzureChatOpenAI:
     if not (config.azure_openai_endpoint and config.azure_openai_api_key and config.azure_openai_deployment):
         raise ValueError("Azure OpenAI endpoint, api key, and deployment must be set.")
@@ -27,6 +87,7 @@ def get_llm_model(config: AppConfig) -> AzureChatOpenAI:
         temperature=0.7,
         timeout=300,
         max_retries=3,
+        **_http_clients(),
     )
 
 
@@ -45,4 +106,154 @@ def get_embeddings(config: AppConfig) -> AzureOpenAIEmbeddings:
         azure_endpoint=config.embeddings_endpoint,
         api_key=config.embeddings_api_key,
         openai_api_version=config.embeddings_api_version,
+        **_http_clients(),
     )
+
+
+class CachedEmbeddings(Embeddings):
+    """In-process LRU cache in front of an embeddings model.
+
+    Query and document embeddings are cached separately since some models
+    embed them differently.
+    """
+
+    def __init__(self, embeddings: Embeddings, maxsize: int = 4096) -> None:
+        self.embeddings = embeddings
+        self.maxsize = maxsize
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[float, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: Tuple[str, str]) -> Tuple[float, ...] | None:
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+            return vector
+
+    def _put(self, key: Tuple[str, str], vector: List[float]) -> None:
+        with self._lock:
+            self._cache[key] = tuple(vector)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def _lookup(self, kind: str, texts: List[str]) -> Tuple[Dict[str, Tuple[float, ...]], List[str]]:
+        found = {}
+        for text in texts:
+            vector = self._get((kind, text))
+            if vector is not None:
+                found[text] = vector
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        return found, missing
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self._get(("query", text))
+        if vector is None:
+            logger.debug("Embedding cache miss for query length=%s", len(text))
+            vector = self.embeddings.embed_query(text)
+            self._put(("query", text), vector)
+        return list(vector)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        found, missing = self._lookup("document", texts)
+        if missing:
+            logger.debug("Embedding cache miss for %s of %s documents", len(missing), len(texts))
+            for text, vector in zip(missing, self.embeddings.embed_documents(missing)):
+                found[text] = vector
+                self._put(("document", text), vector)
+        return [list(found[text]) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = self._get(("query", text))
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self._put(("query", text), vector)
+        return list(vector)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        found, missing = self._lookup("document", texts)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(missing)
+            for text, vector in zip(missing, vectors):
+                found[text] = vector
+                self._put(("document", text), vector)
+        return [list(found[text]) for text in texts]
+
+
+class BatchingEmbeddings(Embeddings):
+    """Coalesce concurrent ``embed_query`` calls into one batched request.
+
+    Memory searches from agents running side by side each embed a query on
+    their own thread. A query that arrives while nothing is being embedded
+    is sent straight away. One that arrives while another request is in
+    flight waits ``window`` seconds for others to join, then sends every
+    pending text in a single ``embed_documents`` call. Query and document
+    embeddings are the same for Azure OpenAI models, which is what makes
+    this substitution safe.
+    """
+
+    def __init__(self, embeddings: Embeddings, window: float = 0.005, max_batch: int = 64) -> None:
+        self.embeddings = embeddings
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[Tuple[str, Future]] = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _enqueue(self, text: str) -> Tuple[Future, bool, bool]:
+        """Queue text; return its future, whether to flush and whether to wait first."""
+        future: Future = Future()
+        with self._lock:
+            self._pending.append((text, future))
+            leader = len(self._pending) == 1
+            full = len(self._pending) >= self.max_batch
+            wait = leader and not full and self._in_flight > 0
+        return future, leader or full, wait
+
+    def _flush(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            self._in_flight += 1
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        logger.debug("Embedding %s queries in one batch", len(texts))
+        try:
+            vectors = dict(zip(texts, self.embeddings.embed_documents(texts)))
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        for text, future in batch:
+            future.set_result(vectors[text])
+
+    def embed_query(self, text: str) -> List[float]:
+        future, flush, wait = self._enqueue(text)
+        if wait:
+            time.sleep(self.window)
+        if flush:
+            self._flush()
+        return future.result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        future, flush, wait = self._enqueue(text)
+        if wait:
+            await asyncio.sleep(self.window)
+        if flush:
+            await asyncio.to_thread(self._flush)
+        return await asyncio.wrap_future(future)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+
+@lru_cache(maxsize=None)
+def get_shared_embeddings(config: AppConfig) -> CachedEmbeddings:
+    """Embeddings shared by the memory store and the semantic cache."""
+    return CachedEmbeddings(BatchingEmbeddings(get_embeddings(config)))
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 import asyncio
+from functools import lru_cache
 import logging
 import importlib.util
-from typing import Any, Dict, Iterable, List
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
 
+import anyio
 from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, create_model
 
@@ -20,14 +23,38 @@ def _normalize_sse_url(base_url: str) -> str:
     return f"{url}/sse"
 
 
+_background_loop: asyncio.AbstractEventLoop | None = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_background_loop.run_forever, name="mcp-client-loop", daemon=True
+            ).start()
+    return _background_loop
+
+
 def _run_coro(coro):
-    try:
-        asyncio.get_running_loop()
-    except RuntimeError:
-        return asyncio.run(coro)
-    raise RuntimeError("MCP client invoked from a running event loop.")
+    # Sync callers share one loop on a daemon thread, so they also share the
+    # MCP session that MCPToolsetClient keeps on that loop.
+    return asyncio.run_coroutine_threadsafe(coro, _get_background_loop()).result()
+
+
+async def _arun_coro(coro):
+    # Async callers from any loop (run_sync threads, the CLI loop) hop onto
+    # the same background loop, so a single long-lived session serves them
+    # all and no session, task or loop is left behind when their loop ends.
+    loop = _get_background_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
 
 
+@lru_cache(maxsize=1)
 def _load_mcp_client() -> tuple[Any, Any]:
     if importlib.util.find_spec("mcp") is None:
         raise ModuleNotFoundError(
@@ -73,6 +100,10 @@ class MCPToolsetClient:
     def __init__(self, base_url: str) -> None:
         self.base_url = base_url.rstrip("/")
         self.sse_url = _normalize_sse_url(base_url)
+        # Tool calls share one long-lived session, held by a task on the
+        # background loop, instead of opening an SSE stream and
+        # re-initializing on every call. Only touched from that loop.
+        self._session_entry: Tuple[asyncio.Future, asyncio.Task] | None = None
 
     def list_tools(self) -> List[Any]:
         return _run_coro(self._list_tools())
@@ -80,6 +111,9 @@ class MCPToolsetClient:
     def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
         return _run_coro(self._call_tool(tool_name, arguments))
 
+    async def acall_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        return await _arun_coro(self._call_tool(tool_name, arguments))
+
     async def _list_tools(self) -> List[Any]:
         ClientSession, sse_client = _load_mcp_client()
 
@@ -92,56 +126,119 @@ class MCPToolsetClient:
             return result.get("tools", [])
         return getattr(result, "tools", result)
 
-    async def _call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
+    async def _hold_session(self, ready: asyncio.Future) -> None:
         ClientSession, sse_client = _load_mcp_client()
+        try:
+            # The SSE client's task group must be entered and exited by the
+            # same task, so this task owns the session for its whole life.
+            async with sse_client(self.sse_url) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    logger.debug("Opened MCP session to %s", self.sse_url)
+                    ready.set_result(session)
+                    await asyncio.get_running_loop().create_future()
+        except Exception as exc:
+            # Connection failures reach callers through ``ready``; a session
+            # that dies later is replaced on the next call.
+            if not ready.done():
+                ready.set_exception(exc)
+            else:
+                logger.debug("MCP session to %s ended: %s", self.sse_url, exc)
+        finally:
+            if not ready.done():
+                ready.cancel()
+            if self._session_entry is not None and self._session_entry[0] is ready:
+                self._session_entry = None
+
+    async def _session(self) -> Tuple[Any, asyncio.Task]:
+        entry = self._session_entry
+        if entry is None:
+            loop = asyncio.get_running_loop()
+            ready = loop.create_future()
+            entry = self._session_entry = (ready, loop.create_task(self._hold_session(ready)))
+        ready, owner = entry
+        return await asyncio.shield(ready), owner
+
+    def _drop_session(self, owner: asyncio.Task) -> None:
+        if self._session_entry is not None and self._session_entry[1] is owner:
+            self._session_entry = None
+        owner.cancel()
 
-        async with sse_client(self.sse_url) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                result = await session.call_tool(tool_name, arguments)
+    async def _call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        session, owner = await self._session()
+        try:
+            result = await session.call_tool(tool_name, arguments)
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+            # The stream was closed under us (server restart, read timeout);
+            # retry once on a fresh session.
+            logger.info("MCP session to %s closed; reconnecting", self.sse_url)
+            self._drop_session(owner)
+            session, _ = await self._session()
+            result = await session.call_tool(tool_name, arguments)
 
         if isinstance(result, dict) and "content" in result:
             return result["content"]
         return result
 
 
-def _build_args_schema(tool_name: str, input_schema: Dict[str, Any]) -> type[BaseModel] | None:
+def _build_args_schema(input_schema: Dict[str, Any]) -> type[BaseModel] | None:
     if not input_schema:
         return None
     properties = input_schema.get("properties", {}) if isinstance(input_schema, dict) else {}
     if not properties:
         return None
     required = set(input_schema.get("required", [])) if isinstance(input_schema, dict) else set()
-    fields = {}
-    for prop in properties:
-        default = ... if prop in required else None
-        fields[prop] = (Any, default)
-    return create_model(f"{tool_name}Args", **fields)
+    return _args_model(tuple((prop, prop in required) for prop in properties))
+
+
+@lru_cache(maxsize=None)
+def _args_model(fields: Tuple[Tuple[str, bool], ...]) -> type[BaseModel]:
+    # Every field is typed Any, so tools whose arguments have the same names
+    # and required flags can share one model.
+    return create_model(
+        "MCPToolArgs", **{prop: (Any, ... if is_required else None) for prop, is_required in fields}
+    )
 
 
 def _build_tool(client: MCPToolsetClient, tool_info: Any) -> StructuredTool:
     tool_name = _tool_field(tool_info, "name") or "unknown"
     description = _tool_field(tool_info, "description") or ""
     input_schema = _tool_field(tool_info, "inputSchema", "input_schema") or {}
-    args_schema = _build_args_schema(tool_name, input_schema)
+    args_schema = _build_args_schema(input_schema)
 
     def handler(**kwargs):
         return client.call_tool(tool_name, kwargs)
 
+    async def ahandler(**kwargs):
+        return await client.acall_tool(tool_name, kwargs)
+
     handler.__name__ = tool_name
+    ahandler.__name__ = tool_name
     return StructuredTool.from_function(
         func=handler,
+        coroutine=ahandler,
         name=tool_name,
         description=description,
         args_schema=args_schema,
     )
 
 
-def build_mcp_toolset(name: str, description: str, base_url: str) -> Toolset:
-    client = MCPToolsetClient(base_url)
+@lru_cache(maxsize=8)
+def _get_client(base_url: str) -> MCPToolsetClient:
+    return MCPToolsetClient(base_url)
+
+
+@lru_cache(maxsize=8)
+def _get_tools(base_url: str) -> Tuple[StructuredTool, ...]:
+    client = _get_client(base_url)
     tools = []
     for tool_info in client.list_tools():
         tool_name = _tool_field(tool_info, "name") or "unknown"
         logger.debug("Registering MCP tool %s from %s", tool_name, base_url)
         tools.append(_build_tool(client, tool_info))
-    return Toolset(name=name, tools=tools, description=description)
+    return tuple(tools)
+
+
+def build_mcp_toolset(name: str, description: str, base_url: str) -> Toolset:
+    tools = _get_tools(base_url.rstrip("/"))
+    return Toolset(name=name, tools=list(tools), description=description)
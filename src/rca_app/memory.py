@@ -1,29 +1,43 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+import hashlib
 import logging
+import threading
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
+import numpy as np
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import InMemorySaver
-from langgraph.store.base import BaseStore
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.store.base import BaseStore, SearchOp
 
 from .config import AppConfig
-from .llm import get_embeddings
-from .persistent_store import SQLiteBackedStore
+from .llm import get_shared_embeddings
+from .persistent_store import SQLiteBackedStore, SQLiteCheckpointSaver
+from .types import STRUCTURED_OUTPUT_MODELS
 
 logger = logging.getLogger(__name__)
 
+MEMORY_CONTEXT_TTL_SECONDS = 60.0
+MEMORY_CONTEXT_CACHE_SIZE = 1024
+
+# (user_id, thread_id, task digest, history length) -> (built_at, memory context)
+_memory_context_cache: "OrderedDict[Tuple[str, str, bytes, int], Tuple[float, str]]" = OrderedDict()
+_memory_context_lock = threading.Lock()
+
 
 @dataclass
 class MemoryStores:
     store: BaseStore
-    checkpointer: InMemorySaver
+    checkpointer: BaseCheckpointSaver
 
 
 def setup_memory(config: AppConfig) -> MemoryStores:
-    embed = get_embeddings(config)
+    embed = get_shared_embeddings(config)
     store = SQLiteBackedStore(
         config.data_dir / "memory_store.sqlite",
         index={
@@ -31,7 +45,16 @@ def setup_memory(config: AppConfig) -> MemoryStores:
             "embed": embed,
         }
     )
-    checkpointer = InMemorySaver()
+    serde = JsonPlusSerializer(
+        allowed_msgpack_modules=[
+            (model.__module__, model.__name__) for model in STRUCTURED_OUTPUT_MODELS
+        ]
+    )
+    if config.persist_checkpoints:
+        checkpointer = SQLiteCheckpointSaver(config.data_dir / "checkpoints.sqlite", serde=serde)
+        logger.info("Checkpoints persisted to %s", config.data_dir / "checkpoints.sqlite")
+    else:
+        checkpointer = InMemorySaver(serde=serde)
     logger.info("Memory store initialized using SQLite at %s", config.data_dir / "memory_store.sqlite")
     return MemoryStores(store=store, checkpointer=checkpointer)
 
@@ -62,25 +85,56 @@ def procedural_recall(task: str, store: BaseStore, config: Dict[str, Any]):
 def semantic_recall(query: str, store: BaseStore, config: Dict[str, Any], limit: int = 3):
     namespace = ("semantic", config["configurable"]["user_id"])
     results = store.search(namespace, query=query, limit=limit * 2)
+    final = _decay_semantic(results)[:limit]
+    logger.debug("Semantic recall returned %s records", len(final))
+    return final
 
+
+def _decay_semantic(results: List[Any]) -> List[Any]:
     now = time.time()
-    decayed = []
+    last_used = np.fromiter(
+        (r.value.get("last_used_at", now) for r in results), dtype=np.float64, count=len(results)
+    )
+    age_days = (now - last_used) * (1 / 86400)
+    is_high = np.fromiter((r.value.get("confidence") == "high" for r in results), dtype=bool, count=len(results))
+    # High confidence decays to medium after 30 days; anything else drops to
+    # low after 60.
+    to_medium = (age_days > 30) & is_high
+    to_low = (age_days > 60) & ~to_medium
+
+    for i in np.flatnonzero(to_medium):
+        results[i].value["confidence"] = "medium"
+    for i in np.flatnonzero(to_low):
+        results[i].value["confidence"] = "low"
 
-    for r in results:
-        v = r.value
-        last_used = v.get("last_used_at", now)
-        age_days = (now - last_used) / 86400
+    return results
 
-        if age_days > 30 and v.get("confidence") == "high":
-            v["confidence"] = "medium"
-        elif age_days > 60:
-            v["confidence"] = "low"
 
-        decayed.append(r)
+def recall_memories(query: str, store: BaseStore, config: Dict[str, Any], semantic_limit: int = 3):
+    """Run semantic_recall, procedural_recall and episodic_recall as one store batch.
 
-    final = decayed[:limit]
-    logger.debug("Semantic recall returned %s records", len(final))
-    return final
+    The three searches share the query, so the store embeds it only once.
+    """
+    user_id = config["configurable"]["user_id"]
+    semantic, procedural, episodic = store.batch(
+        [
+            SearchOp(("semantic", user_id), query=query, limit=semantic_limit * 2),
+            SearchOp(("procedural", user_id), query=query, limit=3),
+            SearchOp(("episodic", user_id), query=query, limit=1),
+        ]
+    )
+    semantic = _decay_semantic(semantic)[:semantic_limit]
+    logger.debug(
+        "Recalled %s semantic, %s procedural and %s episodic records",
+        len(semantic),
+        len(procedural),
+        len(episodic),
+    )
+    return semantic, procedural, episodic
+
+
+def _bullets(items: List[Any]) -> str:
+    return "    - " + "\n    - ".join(map(str, items)) if items else ""
 
 
 def build_memory_augmented_prompt(
@@ -90,40 +144,33 @@ def build_memory_augmented_prompt(
     store: BaseStore,
 ) -> str:
     logger.debug("Building memory augmented prompt for query length=%s", len(query))
-    semantic_memories = semantic_recall(query, store, config, 3)
+    semantic_memories, procedural_memories, episodic_memories = recall_memories(query, store, config)
 
     if semantic_memories:
-        facts = []
-        for sm in semantic_memories:
-            v = sm.value
-            facts.append(f"- {v.get('semantic_fact')} (confidence: {v.get('confidence')})")
-        semantic_context = f"\nGeneralized RCA knowledge:\n{chr(10).join(facts)}\n"
+        facts = "\n".join(
+            f"- {sm.value.get('semantic_fact')} (confidence: {sm.value.get('confidence')})" for sm in semantic_memories
+        )
+        semantic_context = f"\nGeneralized RCA knowledge:\n{facts}\n"
     else:
         semantic_context = "No generalized RCA knowledge found."
 
-    procedural_memories = procedural_recall(query, store, config)
-
     if procedural_memories:
-        procedures = []
-        for pm in procedural_memories:
-            proc = pm.value
-            procedures.append(
-                f"""
-- Procedure: {proc.get("procedure_name", "N/A")}
-  Applicable when: {proc.get("applicable_when", "N/A")}
+        procedures = "".join(
+            f"""
+- Procedure: {pm.value.get("procedure_name", "N/A")}
+  Applicable when: {pm.value.get("applicable_when", "N/A")}
   Steps:
-    {chr(10).join([f"    - {s}" for s in proc.get("steps", [])])}
+    {_bullets(pm.value.get("steps", []))}
   Tool heuristics:
-    {chr(10).join([f"    - {h}" for h in proc.get("tool_heuristics", [])])}
+    {_bullets(pm.value.get("tool_heuristics", []))}
 """
-            )
+            for pm in procedural_memories
+        )
 
-        procedural_context = f"\nRelevant RCA procedures (how to act):\n{''.join(procedures)}\n"
+        procedural_context = f"\nRelevant RCA procedures (how to act):\n{procedures}\n"
     else:
         procedural_context = "No relevant RCA procedures found."
 
-    episodic_memories = episodic_recall(query, store, config)
-
     if episodic_memories:
         mem = episodic_memories[0].value
         episodic_context = f"""
@@ -169,16 +216,54 @@ Instructions:
     return prompt
 
 
+def cached_memory_augmented_prompt(
+    query: str,
+    state: Dict[str, Any],
+    config: Dict[str, Any],
+    store: BaseStore,
+) -> str:
+    """build_memory_augmented_prompt, reused for a short while per user and task.
+
+    Retries of the same task rebuild an identical context, so it is cached
+    briefly. The history length is part of the key, so a new turn in the
+    conversation always gets a fresh context.
+    """
+    key = (
+        config["configurable"]["user_id"],
+        config["configurable"].get("thread_id", ""),
+        hashlib.blake2b(query.encode("utf-8"), digest_size=16).digest(),
+        len(state.get("history", [])),
+    )
+    now = time.monotonic()
+    with _memory_context_lock:
+        cached = _memory_context_cache.get(key)
+        if cached is not None and now - cached[0] < MEMORY_CONTEXT_TTL_SECONDS:
+            _memory_context_cache.move_to_end(key)
+            logger.debug("Reusing memory context for user_id=%s", key[0])
+            return cached[1]
+
+    prompt = build_memory_augmented_prompt(query=query, state=state, config=config, store=store)
+    with _memory_context_lock:
+        _memory_context_cache[key] = (now, prompt)
+        _memory_context_cache.move_to_end(key)
+        while len(_memory_context_cache) > MEMORY_CONTEXT_CACHE_SIZE:
+            _memory_context_cache.popitem(last=False)
+    return prompt
+
+
+def invalidate_memory_context(user_id: str) -> None:
+    with _memory_context_lock:
+        for key in [key for key in _memory_context_cache if key[0] == user_id]:
+            del _memory_context_cache[key]
+
+
 def format_conversation(history: List[BaseMessage]) -> str:
-    conversation = []
-    for message in history:
-        role = ""
-        content = ""
-        if isinstance(message, (BaseMessage, HumanMessage, AIMessage)):
-            role = message.type.upper()
-            content = message.content
-        conversation.append(f"{role}: {content}")
-    return "\n".join(conversation)
+    # HumanMessage and AIMessage are BaseMessages; anything else in the
+    # history renders as an empty entry, as before.
+    return "\n".join(
+        f"{message.type.upper()}: {message.content}" if isinstance(message, BaseMessage) else ": "
+        for message in history
+    )
 
 
 def mark_memory_useful(memories: List[Any]) -> None:
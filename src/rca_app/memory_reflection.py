@@ -8,7 +8,8 @@ from typing import Any, Dict
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 
-from .memory import format_conversation
+from .memory import format_conversation, invalidate_memory_context
+from .utils import run_sync
 
 logger = logging.getLogger(__name__)
 
@@ -102,7 +103,7 @@ def build_semantic_chain(llm):
     return prompt | llm | JsonOutputParser()
 
 
-def add_episodic_memory(rca_state, config, store, llm) -> None:
+async def aadd_episodic_memory(rca_state, config, store, llm) -> None:
     history = rca_state.get("history")
     if not history:
         logger.debug("Skipping episodic memory; no history found")
@@ -110,18 +111,19 @@ def add_episodic_memory(rca_state, config, store, llm) -> None:
 
     conversation = format_conversation(history)
     reflect = build_reflection_chain(llm)
-    reflection = reflect.invoke({"conversation": conversation})
+    reflection = await reflect.ainvoke({"conversation": conversation})
     reflection["conversation"] = conversation
 
-    store.put(
+    await store.aput(
         namespace=("episodic", config["configurable"]["user_id"]),
         key=f"episodic_rca_{uuid.uuid4().hex}",
         value=reflection,
     )
+    invalidate_memory_context(config["configurable"]["user_id"])
     logger.info("Episodic memory stored for user_id=%s", config["configurable"]["user_id"])
 
 
-def add_procedural_memory(rca_state, config, store, llm) -> None:
+async def aadd_procedural_memory(rca_state, config, store, llm) -> None:
     history = rca_state.get("history")
     if not history:
         logger.debug("Skipping procedural memory; no history found")
@@ -129,24 +131,25 @@ def add_procedural_memory(rca_state, config, store, llm) -> None:
 
     conversation = format_conversation(history)
     procedural_reflection = build_procedural_chain(llm)
-    reflection = procedural_reflection.invoke({"conversation": conversation})
+    reflection = await procedural_reflection.ainvoke({"conversation": conversation})
 
-    store.put(
+    await store.aput(
         namespace=("procedural", config["configurable"]["user_id"]),
         key=f"procedural_rca_{uuid.uuid4().hex}",
         value=reflection,
     )
+    invalidate_memory_context(config["configurable"]["user_id"])
     logger.info("Procedural memory stored for user_id=%s", config["configurable"]["user_id"])
 
 
-def build_semantic_memory(
+async def abuild_semantic_memory(
     user_id: str,
     query: str,
     store,
     llm,
     min_episodes: int = 3,
 ) -> Dict[str, Any] | None:
-    episodic = store.search(("episodic", user_id), query=query, limit=10)
+    episodic = await store.asearch(("episodic", user_id), query=query, limit=10)
     if len(episodic) < min_episodes:
         logger.debug("Insufficient episodic memories for semantic reflection; count=%s", len(episodic))
         return None
@@ -161,7 +164,7 @@ def build_semantic_memory(
         )
 
     semantic_reflection_chain = build_semantic_chain(llm)
-    semantic = semantic_reflection_chain.invoke({"episodes": "\n".join(episodes_text)})
+    semantic = await semantic_reflection_chain.ainvoke({"episodes": "\n".join(episodes_text)})
 
     if not semantic or not isinstance(semantic, dict):
         return None
@@ -169,11 +172,30 @@ def build_semantic_memory(
     semantic["usefulness"] = 0
     semantic["last_used_at"] = time.time()
 
-    store.put(
+    await store.aput(
         namespace=("semantic", user_id),
         key=f"semantic_{uuid.uuid4().hex}",
         value=semantic,
     )
+    invalidate_memory_context(user_id)
     logger.info("Semantic memory stored for user_id=%s", user_id)
 
     return semantic
+
+
+def add_episodic_memory(rca_state, config, store, llm) -> None:
+    run_sync(aadd_episodic_memory(rca_state, config, store, llm))
+
+
+def add_procedural_memory(rca_state, config, store, llm) -> None:
+    run_sync(aadd_procedural_memory(rca_state, config, store, llm))
+
+
+def build_semantic_memory(
+    user_id: str,
+    query: str,
+    store,
+    llm,
+    min_episodes: int = 3,
+) -> Dict[str, Any] | None:
+    return run_sync(abuild_semantic_memory(user_id, query, store, llm, min_episodes))
@@ -1,24 +1,120 @@
 from __future__ import annotations
 
 import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+import heapq
 import json
 import logging
+import queue
 import sqlite3
+import threading
 from pathlib import Path
-from typing import Iterable, List
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Sequence, Tuple
 
-from langgraph.store.base import BaseStore, IndexConfig, Op, PutOp, Result
-from langgraph.store.memory import InMemoryStore
+import numpy as np
+import orjson
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    IndexConfig,
+    Item,
+    ListNamespacesOp,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+from langgraph.store.base.embed import ensure_embeddings, get_text_at_path, tokenize_path
+# Filter and namespace matching follow InMemoryStore exactly.
+from langgraph.store.memory import _compare_values, _does_match
 
 logger = logging.getLogger(__name__)
 
+SCAN_BATCH_SIZE = 1024
+WRITE_BATCH_MAX_REQUESTS = 100
+
+# InMemoryStore yields namespaces in the order they were first written and
+# keys in insertion order within each; upserts keep their rowid, so this
+# reproduces it. (A namespace whose rows were all deleted loses its place,
+# where InMemoryStore keeps the empty namespace.)
+_SCAN_ORDER = "ORDER BY MIN(rowid) OVER (PARTITION BY namespace), rowid"
+
+
+@dataclass
+class _WriteRequest:
+    deletes: List[Tuple[str, str]]
+    upserts: List[Tuple[Any, ...]]
+    done: threading.Event = field(default_factory=threading.Event)
+    error: Exception | None = None
+    # Called on the writer thread once the request is committed or failed.
+    on_done: Callable[[], None] | None = None
+
+
+# There are only a few namespaces per user, so both directions are cached.
+@lru_cache(maxsize=1024)
+def _encode_namespace(namespace: Tuple[str, ...]) -> str:
+    # Namespaces stay in json.dumps format: the column is part of the primary
+    # key, so existing rows must keep matching.
+    return json.dumps(list(namespace))
+
+
+@lru_cache(maxsize=1024)
+def _decode_namespace(namespace_json: str) -> Tuple[str, ...]:
+    return tuple(orjson.loads(namespace_json))
+
+
+def _namespace_clause(prefix: Tuple[str, ...]) -> Tuple[str, Tuple[str, ...]]:
+    if not prefix:
+        return "", ()
+    exact = _encode_namespace(prefix)
+    # '["episodic", "2"' followed by ', ' matches every deeper namespace.
+    pattern = exact[:-1].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + ", %"
+    return "WHERE (namespace = ? OR namespace LIKE ? ESCAPE '\\')", (exact, pattern)
+
+
+def _vectors_by_key(
+    to_embed: Dict[str, List[Tuple[Tuple[str, ...], str, str]]], embedded: List[List[float]]
+) -> Dict[Tuple[Tuple[str, ...], str], Dict[str, List[float]]]:
+    vectors: Dict[Tuple[Tuple[str, ...], str], Dict[str, List[float]]] = defaultdict(dict)
+    for embedding, targets in zip(embedded, to_embed.values()):
+        for namespace, key, path in targets:
+            vectors[(namespace, key)][path] = embedding
+    return vectors
+
+
+def _parse_timestamp(value: str | None) -> datetime:
+    # Rows written before timestamps were stored have none.
+    return datetime.fromisoformat(value) if value else datetime.now(timezone.utc)
+
 
 class SQLiteBackedStore(BaseStore):
+    """Memory store that keeps records and their embeddings in SQLite.
+
+    Reads are answered from the database rather than an in-memory copy, so
+    start-up does not replay the table and memory use does not grow with
+    the number of records. Vector search scans the candidate namespace in
+    chunks and keeps only the best matches.
+    """
+
     def __init__(self, path: Path, *, index: IndexConfig | None = None) -> None:
         self._path = path
         self._path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(self._path)
+        # Writes go through a single writer thread that commits whatever has
+        # queued up in one transaction; reads use their own connection, which
+        # WAL lets proceed while a commit is in flight.
+        self._conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
         self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
         self._conn.execute(
             """
             CREATE TABLE IF NOT EXISTS memory_store (
@@ -29,44 +125,406 @@ class SQLiteBackedStore(BaseStore):
             )
             """
         )
-        self._store = InMemoryStore(index=index)
-        self._load_from_disk()
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(memory_store)")}
+        if "index_spec" not in columns:
+            self._conn.execute("ALTER TABLE memory_store ADD COLUMN index_spec TEXT")
+        if "vectors" not in columns:
+            self._conn.execute("ALTER TABLE memory_store ADD COLUMN vectors BLOB")
+        if "created_at" not in columns:
+            self._conn.execute("ALTER TABLE memory_store ADD COLUMN created_at TEXT")
+        if "updated_at" not in columns:
+            self._conn.execute("ALTER TABLE memory_store ADD COLUMN updated_at TEXT")
+        self._writes: "queue.SimpleQueue[_WriteRequest]" = queue.SimpleQueue()
+        threading.Thread(target=self._write_loop, name="memory-store-writer", daemon=True).start()
+        # Tools run on worker threads, so the read connection is shared
+        # across threads and serialized with a lock.
+        self._read_conn = sqlite3.connect(self._path, check_same_thread=False)
+        self._read_conn.execute("PRAGMA temp_store=MEMORY")
+        self._lock = threading.Lock()
 
-    def _load_from_disk(self) -> None:
-        cursor = self._conn.execute("SELECT namespace, key, value FROM memory_store")
-        rows = cursor.fetchall()
+        self.index_config = index.copy() if index else None
+        self.embeddings: Embeddings | None = None
+        if self.index_config:
+            self.embeddings = ensure_embeddings(self.index_config.get("embed"))
+            self.index_config["__tokenized_fields"] = [
+                (p, tokenize_path(p)) if p != "$" else (p, p) for p in (self.index_config.get("fields") or ["$"])
+            ]
+        self._backfill_vectors()
+
+    def _backfill_vectors(self) -> None:
+        # Rows saved before embeddings were persisted are embedded once and
+        # written back; index=False rows are stored with index_spec 'false'.
+        if not self.embeddings:
+            return
+        with self._lock:
+            rows = self._read_conn.execute(
+                "SELECT namespace, key, value, index_spec FROM memory_store "
+                "WHERE vectors IS NULL AND (index_spec IS NULL OR index_spec != 'false')"
+            ).fetchall()
         if not rows:
-            logger.info("No persisted memory found at %s", self._path)
             return
-        ops: List[PutOp] = []
-        for namespace_json, key, value_json in rows:
-            namespace = tuple(json.loads(namespace_json))
-            value = json.loads(value_json)
-            ops.append(PutOp(namespace, key, value))
-        self._store.batch(ops)
-        logger.info("Loaded %s persisted memory records from %s", len(rows), self._path)
+        for start in range(0, len(rows), SCAN_BATCH_SIZE):
+            self._persist(
+                [
+                    PutOp(
+                        _decode_namespace(namespace_json),
+                        key,
+                        orjson.loads(value_json),
+                        index=orjson.loads(index_json) if index_json else None,
+                    )
+                    for namespace_json, key, value_json, index_json in rows[start : start + SCAN_BATCH_SIZE]
+                ]
+            )
+        logger.info("Embedded %s persisted memory records without stored vectors", len(rows))
 
     def batch(self, ops: Iterable[Op]) -> list[Result]:
-        ops_list = list(ops)
-        results = self._store.batch(ops_list)
-        put_ops = [op for op in ops_list if isinstance(op, PutOp)]
+        ops = list(ops)
+        queries = self._search_queries(ops)
+        query_vectors = {query: self.embeddings.embed_query(query) for query in queries}
+        results, put_ops = self._read_ops(ops, query_vectors)
         if put_ops:
-            with self._conn:
-                for op in put_ops:
-                    namespace_json = json.dumps(op.namespace)
-                    if op.value is None:
-                        self._conn.execute(
-                            "DELETE FROM memory_store WHERE namespace = ? AND key = ?",
-                            (namespace_json, op.key),
-                        )
-                    else:
-                        self._conn.execute(
-                            "INSERT OR REPLACE INTO memory_store (namespace, key, value) VALUES (?, ?, ?)",
-                            (namespace_json, op.key, json.dumps(op.value)),
-                        )
-            logger.debug("Persisted %s memory operations", len(put_ops))
+            self._persist(put_ops)
         return results
 
     async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        # Embedding calls and commits are awaited directly; only the SQLite
+        # reads run on a worker thread.
+        ops = list(ops)
+        queries = list(self._search_queries(ops))
+        embedded = await asyncio.gather(*(self.embeddings.aembed_query(query) for query in queries))
+        results, put_ops = await asyncio.to_thread(self._read_ops, ops, dict(zip(queries, embedded)))
+        if put_ops:
+            await self._apersist(put_ops)
+        return results
+
+    def _search_queries(self, ops: List[Op]) -> set[str]:
+        if not self.embeddings:
+            return set()
+        return {op.query for op in ops if isinstance(op, SearchOp) and op.query}
+
+    def _read_ops(
+        self, ops: List[Op], query_vectors: Dict[str, List[float]]
+    ) -> Tuple[list[Result], List[PutOp]]:
+        # As in InMemoryStore, reads in a batch see the state from before
+        # its writes, and only the last write to a key counts.
+        results: list[Result] = []
+        put_ops: Dict[Tuple[Tuple[str, ...], str], PutOp] = {}
+        for op in ops:
+            if isinstance(op, GetOp):
+                results.append(self._get(op))
+            elif isinstance(op, SearchOp):
+                results.append(self._search(op, query_vectors.get(op.query) if op.query else None))
+            elif isinstance(op, ListNamespacesOp):
+                results.append(self._list_namespaces(op))
+            elif isinstance(op, PutOp):
+                put_ops[(op.namespace, op.key)] = op
+                results.append(None)
+            else:
+                raise ValueError(f"Unknown operation type: {type(op)}")
+        return results, list(put_ops.values())
+
+    def _get(self, op: GetOp) -> Item | None:
+        with self._lock:
+            row = self._read_conn.execute(
+                "SELECT value, created_at, updated_at FROM memory_store WHERE namespace = ? AND key = ?",
+                (_encode_namespace(op.namespace), op.key),
+            ).fetchone()
+        if row is None:
+            return None
+        value_json, created_at, updated_at = row
+        return Item(
+            value=orjson.loads(value_json),
+            key=op.key,
+            namespace=op.namespace,
+            created_at=_parse_timestamp(created_at),
+            updated_at=_parse_timestamp(updated_at),
+        )
+
+    def _search(self, op: SearchOp, query_embedding: List[float] | None) -> List[SearchItem]:
+        query_vector = None
+        if query_embedding is not None:
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            query_vector /= np.linalg.norm(query_vector) or 1.0
+        where, params = _namespace_clause(op.namespace_prefix)
+        columns = "namespace, key, value, vectors, created_at, updated_at"
+
+        def matches(value: Dict[str, Any]) -> bool:
+            return all(_compare_values(value.get(key), expected) for key, expected in op.filter.items())
+
+        def to_item(row: Tuple[Any, ...], value: Dict[str, Any] | None, score: float | None = None) -> SearchItem:
+            namespace_json, key, value_json, _, created_at, updated_at = row
+            return SearchItem(
+                namespace=_decode_namespace(namespace_json),
+                key=key,
+                value=value if value is not None else orjson.loads(value_json),
+                created_at=_parse_timestamp(created_at),
+                updated_at=_parse_timestamp(updated_at),
+                score=score,
+            )
+
+        with self._lock:
+            if query_vector is None and not op.filter:
+                rows = self._read_conn.execute(
+                    f"SELECT {columns} FROM memory_store {where} {_SCAN_ORDER} LIMIT ? OFFSET ?",
+                    (*params, op.limit, op.offset),
+                ).fetchall()
+                return [to_item(row, None) for row in rows]
+
+            cursor = self._read_conn.execute(f"SELECT {columns} FROM memory_store {where} {_SCAN_ORDER}", params)
+            if query_vector is None:
+                found: List[SearchItem] = []
+                skipped = 0
+                for row in cursor:
+                    value = orjson.loads(row[2])
+                    if not matches(value):
+                        continue
+                    if skipped < op.offset:
+                        skipped += 1
+                        continue
+                    found.append(to_item(row, value))
+                    if len(found) >= op.limit:
+                        break
+                return found
+
+            # Keep the offset + limit best scores seen so far; rows without a
+            # usable embedding only fill in when there are too few scored ones.
+            keep = op.offset + op.limit
+            best: List[Tuple[float, int, Tuple[Any, ...], Dict[str, Any] | None]] = []
+            scoreless: List[Tuple[Tuple[Any, ...], Dict[str, Any] | None]] = []
+            seen = 0
+            while rows := cursor.fetchmany(SCAN_BATCH_SIZE):
+                candidates = []
+                flat: List[List[float]] = []
+                owners: List[int] = []
+                for row in rows:
+                    value = None
+                    if op.filter:
+                        value = orjson.loads(row[2])
+                        if not matches(value):
+                            continue
+                    vectors = orjson.loads(row[3]) if row[3] else {}
+                    usable = [vector for vector in vectors.values() if len(vector) == len(query_vector)]
+                    if not usable:
+                        if len(scoreless) < op.limit:
+                            scoreless.append((row, value))
+                        continue
+                    flat.extend(usable)
+                    owners.extend([len(candidates)] * len(usable))
+                    candidates.append((row, value))
+                if not candidates:
+                    continue
+                matrix = np.asarray(flat, dtype=np.float32)
+                norms = np.linalg.norm(matrix, axis=1)
+                norms[norms == 0] = 1.0
+                similarities = (matrix @ query_vector) / norms
+                # Max-pool over the embedded fields of each record.
+                scores = np.full(len(candidates), -np.inf, dtype=np.float32)
+                np.maximum.at(scores, np.asarray(owners), similarities)
+                for score, (row, value) in zip(scores.tolist(), candidates):
+                    entry = (score, -seen, row, value)
+                    seen += 1
+                    if len(best) < keep:
+                        heapq.heappush(best, entry)
+                    elif entry > best[0]:
+                        heapq.heapreplace(best, entry)
+
+        kept = [to_item(row, value, score) for score, _, row, value in sorted(best, reverse=True)[op.offset :]]
+        if len(kept) < op.limit:
+            kept.extend(to_item(row, value) for row, value in scoreless[: op.limit - len(kept)])
+        return kept
+
+    def _list_namespaces(self, op: ListNamespacesOp) -> List[Tuple[str, ...]]:
+        with self._lock:
+            rows = self._read_conn.execute("SELECT DISTINCT namespace FROM memory_store").fetchall()
+        namespaces = [_decode_namespace(namespace_json) for (namespace_json,) in rows]
+        if op.match_conditions:
+            namespaces = [
+                ns for ns in namespaces if all(_does_match(condition, ns) for condition in op.match_conditions)
+            ]
+        if op.max_depth is not None:
+            namespaces = sorted({ns[: op.max_depth] for ns in namespaces})
+        else:
+            namespaces = sorted(namespaces)
+        return namespaces[op.offset : op.offset + op.limit]
+
+    def _texts_to_embed(self, put_ops: List[PutOp]) -> Dict[str, List[Tuple[Tuple[str, ...], str, str]]]:
+        # Same field extraction as InMemoryStore, one path entry per text.
+        to_embed: Dict[str, List[Tuple[Tuple[str, ...], str, str]]] = defaultdict(list)
+        if not self.embeddings:
+            return to_embed
+        for op in put_ops:
+            if op.value is None or op.index is False:
+                continue
+            if op.index is None:
+                paths = self.index_config["__tokenized_fields"]
+            else:
+                paths = [(ix, tokenize_path(ix)) for ix in op.index]
+            for path, field in paths:
+                texts = get_text_at_path(op.value, field)
+                if len(texts) > 1:
+                    for i, text in enumerate(texts):
+                        to_embed[text].append((op.namespace, op.key, f"{path}.{i}"))
+                elif texts:
+                    to_embed[texts[0]].append((op.namespace, op.key, path))
+        return to_embed
+
+    def _persist(self, put_ops: List[PutOp]) -> None:
+        # Only the last write to a key counts (as in InMemoryStore), which
+        # makes it safe to group deletes and upserts into two statements.
+        latest = list({(op.namespace, op.key): op for op in put_ops}.values())
+        to_embed = self._texts_to_embed(latest)
+        embedded = self.embeddings.embed_documents(list(to_embed)) if to_embed else []
+        request = self._write_request(latest, _vectors_by_key(to_embed, embedded))
+        self._writes.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        logger.debug("Persisted %s memory operations", len(latest))
+
+    async def _apersist(self, put_ops: List[PutOp]) -> None:
+        latest = list({(op.namespace, op.key): op for op in put_ops}.values())
+        to_embed = self._texts_to_embed(latest)
+        embedded = await self.embeddings.aembed_documents(list(to_embed)) if to_embed else []
+        request = self._write_request(latest, _vectors_by_key(to_embed, embedded))
+        loop = asyncio.get_running_loop()
+        committed = loop.create_future()
+
+        def resolve() -> None:
+            if not committed.done():
+                committed.set_result(None)
+
+        request.on_done = lambda: loop.call_soon_threadsafe(resolve)
+        self._writes.put(request)
+        await committed
+        if request.error is not None:
+            raise request.error
+        logger.debug("Persisted %s memory operations", len(latest))
+
+    def _write_request(
+        self, put_ops: List[PutOp], vectors_by_key: Dict[Tuple[Tuple[str, ...], str], Dict[str, List[float]]]
+    ) -> _WriteRequest:
+        now = datetime.now(timezone.utc).isoformat()
+        deletes = []
+        upserts = []
+        for op in put_ops:
+            namespace_json = _encode_namespace(op.namespace)
+            if op.value is None:
+                deletes.append((namespace_json, op.key))
+                continue
+            vectors = vectors_by_key.get((op.namespace, op.key))
+            upserts.append(
+                (
+                    namespace_json,
+                    op.key,
+                    # Stored as raw orjson bytes; SQLite keeps them as a BLOB
+                    # and orjson.loads reads both these and older TEXT rows.
+                    orjson.dumps(op.value, option=orjson.OPT_NON_STR_KEYS),
+                    None if op.index is None else orjson.dumps(op.index).decode(),
+                    orjson.dumps(vectors, default=float, option=orjson.OPT_SERIALIZE_NUMPY) if vectors else None,
+                    now,
+                    now,
+                )
+            )
+        return _WriteRequest(deletes, upserts)
+
+    def _write_loop(self) -> None:
+        while True:
+            pending = [self._writes.get()]
+            # Group commit: everything queued while the previous transaction
+            # was being written goes into the next one.
+            while len(pending) < WRITE_BATCH_MAX_REQUESTS:
+                try:
+                    pending.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._conn.execute("BEGIN")
+                for request in pending:
+                    if request.deletes:
+                        self._conn.executemany(
+                            "DELETE FROM memory_store WHERE namespace = ? AND key = ?", request.deletes
+                        )
+                    if request.upserts:
+                        self._conn.executemany(
+                            "INSERT INTO memory_store (namespace, key, value, index_spec, vectors, created_at, updated_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                            "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, "
+                            "index_spec = excluded.index_spec, vectors = excluded.vectors, "
+                            "updated_at = excluded.updated_at",
+                            request.upserts,
+                        )
+                self._conn.execute("COMMIT")
+            except Exception as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                logger.exception("Failed to write %s memory store requests", len(pending))
+                for request in pending:
+                    request.error = e
+            finally:
+                for request in pending:
+                    request.done.set()
+                    if request.on_done is not None:
+                        try:
+                            request.on_done()
+                        except RuntimeError:
+                            # The waiting event loop has already closed.
+                            pass
+
+
+class SQLiteCheckpointSaver(SqliteSaver):
+    """SqliteSaver that also serves the async checkpoint API.
+
+    The graph and its sub-agents only use the async API. SqliteSaver
+    serializes access to its connection with a lock, so the async methods
+    run the sync ones on the default executor.
+    """
+
+    def __init__(self, path: Path, *, serde: SerializerProtocol | None = None) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        super().__init__(conn, serde=serde)
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: Dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        loop = asyncio.get_running_loop()
+        checkpoints = await loop.run_in_executor(
+            None, lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self.batch, list(ops))
+        await loop.run_in_executor(None, self.delete_thread, thread_id)
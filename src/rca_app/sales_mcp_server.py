@@ -5,7 +5,7 @@ import logging
 from mcp.server.fastmcp import FastMCP
 
 from .config import AppConfig
-from .data import load_sales
+from .data import load_sales, load_sales_records
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +26,7 @@ def get_daily_sales():
     config = _get_config()
     df = load_sales(config)
     daily = (
-        df.groupby(["transaction_date", "store_id", "store_name"], as_index=False)[
+        df.groupby(["transaction_date", "store_id", "store_name"], as_index=False, observed=True)[
             "quantity_sold"
         ]
         .sum()
@@ -62,7 +62,7 @@ def get_promo_sales_by_store():
     df = load_sales(config)
     promo_df = df[df["is_promotion"] == True]
     promo_sales = (
-        promo_df.groupby(["store_id", "store_name"], as_index=False)["quantity_sold"]
+        promo_df.groupby(["store_id", "store_name"], as_index=False, observed=True)["quantity_sold"]
         .sum()
         .rename(columns={"quantity_sold": "promo_qty_sold"})
     )
@@ -76,8 +76,7 @@ def get_sales_data():
     """Return sales data as list of dicts."""
     logger.debug("get_sales_data invoked")
     config = _get_config()
-    df = load_sales(config)
-    records = df.to_dict(orient="records")
+    records = load_sales_records(config)
     logger.debug("get_sales_data returning %s records", len(records))
     return records
 
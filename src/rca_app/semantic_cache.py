@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import logging
+from pathlib import Path
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Embeddings barely move when a single entity changes ("Store North" vs
+# "Store South", "May" vs "June", S003 vs S004), so every content word of the
+# text given here (the task and its entities, not the whole prompt) is matched
+# lexically on top of the semantic similarity. Only filler words are left to
+# the embedding.
+_WORD_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be been but by can could did do does during for from had
+    has have how i in into is it its me my of on or our please show tell than
+    that the their them then there these this those to was we were what when
+    where which while who why will with would you your
+    """.split()
+)
+
+
+def lexical_fingerprint(text: str, *extra: str) -> str:
+    words = sorted({word for word in _WORD_RE.findall(text.lower()) if word not in _STOPWORDS})
+    digest = hashlib.blake2b(digest_size=16)
+    for part in [*words, "\x00", *extra]:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+@dataclass
+class _CacheEntry:
+    namespace: Hashable
+    lexical_key: str
+    vector: np.ndarray
+    value: Any
+    created_at: float
+
+
+class SemanticCache:
+    """LRU cache that matches lookups by embedding similarity.
+
+    Entries are isolated by namespace (e.g. agent + user) and by a lexical
+    key, so only near-duplicate prompts about the same entities are reused.
+    Entries older than ``ttl_seconds`` are never returned.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], Sequence[float]],
+        threshold: float = 0.90,
+        maxsize: int = 1024,
+        ttl_seconds: Optional[float] = None,
+    ):
+        self._embed_fn = embed_fn
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cache_hits_total": self.hits,
+            "cache_misses_total": self.misses,
+            "entries": len(self._entries),
+        }
+
+    def _is_expired(self, entry: _CacheEntry, now: float) -> bool:
+        return self.ttl_seconds is not None and now - entry.created_at > self.ttl_seconds
+
+    def _add_entry(self, entry: _CacheEntry) -> None:
+        self._entries[self._next_id] = entry
+        self._next_id += 1
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self._embed_fn(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        return vector
+
+    def get(self, namespace: Hashable, vector: np.ndarray, lexical_key: str = "") -> Optional[Any]:
+        with self._lock:
+            now = time.time()
+            candidates: List[int] = []
+            expired: List[int] = []
+            for entry_id, entry in self._entries.items():
+                if self._is_expired(entry, now):
+                    expired.append(entry_id)
+                elif entry.namespace == namespace and entry.lexical_key == lexical_key:
+                    candidates.append(entry_id)
+            for entry_id in expired:
+                del self._entries[entry_id]
+            if not candidates:
+                self.misses += 1
+                return None
+
+            matrix = np.stack([self._entries[entry_id].vector for entry_id in candidates])
+            scores = matrix @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                logger.debug(
+                    "Semantic cache miss namespace=%s best_score=%.3f", namespace, scores[best]
+                )
+                return None
+
+            entry_id = candidates[best]
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            logger.debug("Semantic cache hit namespace=%s score=%.3f", namespace, scores[best])
+            return self._entries[entry_id].value
+
+    def put(self, namespace: Hashable, vector: np.ndarray, value: Any, lexical_key: str = "") -> None:
+        with self._lock:
+            self._add_entry(_CacheEntry(namespace, lexical_key, vector, value, time.time()))
+
+    def get_or_compute(
+        self,
+        namespace: Hashable,
+        text: str,
+        compute: Callable[[], Any],
+        lexical_key: str = "",
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        try:
+            vector = self.embed(text)
+        except Exception:
+            logger.warning("Semantic cache embedding failed; bypassing cache", exc_info=True)
+            return compute()
+
+        cached = self.get(namespace, vector, lexical_key)
+        if cached is not None:
+            return cached
+
+        value = compute()
+        if cacheable is None or cacheable(value):
+            self.put(namespace, vector, value, lexical_key)
+        return value
+
+    async def aget_or_compute(
+        self,
+        namespace: Hashable,
+        text: str,
+        compute: Callable[[], Awaitable[Any]],
+        lexical_key: str = "",
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        try:
+            vector = await asyncio.to_thread(self.embed, text)
+        except Exception:
+            logger.warning("Semantic cache embedding failed; bypassing cache", exc_info=True)
+            return await compute()
+
+        cached = self.get(namespace, vector, lexical_key)
+        if cached is not None:
+            return cached
+
+        value = await compute()
+        if cacheable is None or cacheable(value):
+            await asyncio.to_thread(self.put, namespace, vector, value, lexical_key)
+        return value
+
+
+class SQLiteBackedSemanticCache(SemanticCache):
+    """Semantic cache whose entries survive restarts.
+
+    Entries are written through to a SQLite file (next to the memory store)
+    and the newest unexpired ones are loaded back on startup, so a fresh
+    worker starts warm.
+    """
+
+    def __init__(self, path: Path, embed_fn: Callable[[str], Sequence[float]], **kwargs: Any):
+        super().__init__(embed_fn, **kwargs)
+        self._path = path
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self._path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS semantic_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                namespace TEXT NOT NULL,
+                lexical_key TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                value BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._load_from_disk()
+
+    def _prune(self, now: float) -> None:
+        # Callers hold self._lock and a transaction on self._conn.
+        if self.ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM semantic_cache WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            )
+        # Only the newest maxsize rows can ever be served, drop the rest.
+        self._conn.execute(
+            "DELETE FROM semantic_cache WHERE id NOT IN "
+            "(SELECT id FROM semantic_cache ORDER BY id DESC LIMIT ?)",
+            (self.maxsize,),
+        )
+
+    def _load_from_disk(self) -> None:
+        with self._lock, self._conn:
+            self._prune(time.time())
+            rows = self._conn.execute(
+                "SELECT namespace, lexical_key, vector, value, created_at "
+                "FROM semantic_cache ORDER BY id"
+            ).fetchall()
+            for namespace_json, lexical_key, vector, value, created_at in rows:
+                self._add_entry(
+                    _CacheEntry(
+                        tuple(orjson.loads(namespace_json)),
+                        lexical_key,
+                        np.frombuffer(vector, dtype=np.float32),
+                        orjson.loads(value),
+                        created_at,
+                    )
+                )
+        logger.info("Loaded %s semantic cache entries from %s", len(rows), self._path)
+
+    def put(self, namespace: Hashable, vector: np.ndarray, value: Any, lexical_key: str = "") -> None:
+        created_at = time.time()
+        with self._lock:
+            self._add_entry(_CacheEntry(namespace, lexical_key, vector, value, created_at))
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT INTO semantic_cache "
+                        "(namespace, lexical_key, vector, value, created_at) VALUES (?, ?, ?, ?, ?)",
+                        (
+                            orjson.dumps(namespace).decode(),
+                            lexical_key,
+                            np.asarray(vector, dtype=np.float32).tobytes(),
+                            orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS),
+                            created_at,
+                        ),
+                    )
+                    # Expired and evicted rows are dropped as the session
+                    # goes, not only on the next start.
+                    self._prune(created_at)
+            except (sqlite3.Error, TypeError):
+                logger.warning("Failed to persist semantic cache entry", exc_info=True)
@@ -36,7 +36,10 @@ class Toolset:
     def get_tool(self, tool_name: str) -> Any:
         if tool_name in self._tool_lookup:
             return self._tool_lookup[tool_name]
-        raise KeyError(f"Tool '{tool_name}' not found in toolset '{self.name}'.")
+        available = ", ".join(sorted(self._tool_lookup)) or "none"
+        raise KeyError(
+            f"Tool '{tool_name}' not found in toolset '{self.name}'. Available tools: {available}."
+        )
 
 
 class ToolsetRegistry:
@@ -63,12 +66,16 @@ class ToolsetRegistry:
     def get_toolset(self, name: str) -> Toolset:
         if name in self._toolsets:
             return self._toolsets[name]
-        raise KeyError(f"Toolset '{name}' not found.")
+        available = ", ".join(sorted(self._toolsets)) or "none"
+        raise KeyError(f"Toolset '{name}' not found. Available toolsets: {available}.")
 
     def find_tool(self, tool_name: str) -> Any:
         if tool_name in self._tools:
             return self._tools[tool_name]
-        raise KeyError(f"Tool '{tool_name}' not found in registered toolsets.")
+        available = ", ".join(sorted(self._tools)) or "none"
+        raise KeyError(
+            f"Tool '{tool_name}' not found in registered toolsets. Available tools: {available}."
+        )
 
     def all_tools(self) -> List[Any]:
         return list(self._tools.values())
@@ -2,9 +2,68 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, NotRequired, TypedDict
 
+from pydantic import BaseModel, Field
+
 
 class RCAState(TypedDict):
     task: str
     output: str
     trace: List[Dict[str, Any]]
     history: NotRequired[List[Any]]
+
+
+class HypothesisOutput(BaseModel):
+    hypotheses: List[str] = Field(description="Plain-string root-cause hypotheses.")
+    reasoning: str = Field(description="How the hypotheses were generated.")
+
+
+class SalesAnalysisOutput(BaseModel):
+    sales_insights: Dict[str, Any] = Field(
+        description="Findings from sales and promotion data that support or refute the hypotheses."
+    )
+
+
+class InventoryAnalysisOutput(BaseModel):
+    inventory_insights: Dict[str, Any] = Field(
+        description="Findings from inventory movements, transfers, adjustments and replenishments."
+    )
+
+
+class HypothesisValidationOutput(BaseModel):
+    validated: Dict[str, bool] = Field(description="Hypothesis -> true / false.")
+    reasoning: Dict[str, str] = Field(description="Hypothesis -> explanation.")
+
+
+class TimelineEvent(BaseModel):
+    date: str = Field(description="YYYY-MM-DD")
+    event: str
+
+
+class RootCause(BaseModel):
+    primary_root_causes: List[str]
+    supporting_evidence: Dict[str, Any] = Field(
+        description="Evidence keyed by 'sales', 'inventory' and 'cross_analysis'."
+    )
+    contributing_factors: List[str]
+    timeline: List[TimelineEvent]
+    recommendations: List[str]
+
+
+class RootCauseAnalysisOutput(BaseModel):
+    root_cause: RootCause
+    reasoning: Dict[str, str] = Field(
+        description="Explanation for each root_cause section, keyed by section name."
+    )
+
+
+# Structured responses are stored in agent checkpoints; the checkpoint
+# serializer must be told these models are safe to load back.
+STRUCTURED_OUTPUT_MODELS = (
+    HypothesisOutput,
+    SalesAnalysisOutput,
+    InventoryAnalysisOutput,
+    HypothesisValidationOutput,
+    TimelineEvent,
+    RootCause,
+    RootCauseAnalysisOutput,
+)
@@ -1,33 +1,115 @@
 from __future__ import annotations
 
+import ast
+import asyncio
 import json
 import logging
 import re
-from typing import Any, Dict, List
+import threading
+import weakref
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
-from langchain.agents.middleware import wrap_tool_call
+import orjson
+from langchain.agents.middleware import AgentMiddleware
 from langchain.messages import ToolMessage
 from langchain_core.messages import AIMessage
 
 logger = logging.getLogger(__name__)
 
+_sync_loops = threading.local()
+
+
+class _SyncLoop:
+    """Owns one thread's run_sync loop and closes it when the thread exits."""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        # threading.local drops the holder when its thread ends; the finalizer
+        # also runs at interpreter exit for threads that are still alive.
+        weakref.finalize(self, _close_sync_loop, self.loop)
+
+
+def _close_sync_loop(loop: asyncio.AbstractEventLoop) -> None:
+    if loop.is_closed() or loop.is_running():
+        return
+    try:
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    except Exception:
+        logger.debug("Error while shutting down a run_sync loop", exc_info=True)
+    finally:
+        loop.close()
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code.
+
+    Each calling thread reuses its own event loop across calls: the async LLM
+    and HTTP clients keep pooled connections bound to the loop that opened
+    them, and a loop can only be driven by one thread at a time.
+    """
+    holder = getattr(_sync_loops, "holder", None)
+    if holder is None or holder.loop.is_closed():
+        holder = _sync_loops.holder = _SyncLoop()
+    return holder.loop.run_until_complete(coro)
+
+
+def to_prompt_json(value: Any) -> str:
+    return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+_JSON_FENCE_NEWLINE_RE = re.compile(r"```json\s*\n([\s\S]*?)\n```")
+_JSON_FENCE_RE = re.compile(r"```json\s*([\s\S]*?)```")
+_ANY_FENCE_RE = re.compile(r"```\s*\n?([\s\S]*?)\n?```")
+
 
 def extract_json_from_response(response_text: str) -> str:
-    match = re.search(r"```json\s*\n([\s\S]*?)\n```", response_text)
-    if match:
-        return match.group(1).strip()
+    # Unfenced output, the usual case, never reaches the regexes.
+    if "```" not in response_text:
+        return response_text.strip()
 
-    match = re.search(r"```json\s*([\s\S]*?)```", response_text)
-    if match:
-        return match.group(1).strip()
+    if "```json" in response_text:
+        match = _JSON_FENCE_NEWLINE_RE.search(response_text) or _JSON_FENCE_RE.search(response_text)
+        if match:
+            return match.group(1).strip()
 
-    match = re.search(r"```\s*\n?([\s\S]*?)\n?```", response_text)
+    match = _ANY_FENCE_RE.search(response_text)
     if match:
         return match.group(1).strip()
 
     return response_text.strip()
 
 
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+
+def _repair_json(text: str) -> Any | None:
+    """Fix the usual LLM JSON slips without another model call.
+
+    Handles prose around the object, trailing commas and Python-style
+    literals (single quotes, True/False/None). Returns None if the text
+    still can't be parsed.
+    """
+    start = min((i for i in (text.find("{"), text.find("[")) if i != -1), default=-1)
+    end = max(text.rfind("}"), text.rfind("]"))
+    if start == -1 or end <= start:
+        return None
+    candidate = _TRAILING_COMMA_RE.sub(r"\1", text[start : end + 1])
+    try:
+        return orjson.loads(candidate)
+    except orjson.JSONDecodeError:
+        pass
+    try:
+        value = ast.literal_eval(candidate)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+    return value if isinstance(value, (dict, list)) else None
+
+
 def process_response(response_content: str, llm=None) -> Dict[str, Any]:
     json_decoder_prompt = """
 You are an expert in resolving JSON decoding errors.
@@ -46,16 +128,20 @@ Return ONLY the corrected JSON.
 
     for attempt in range(1, 4):
         try:
-            content = extract_json_from_response(response_content)
+            extracted = content = extract_json_from_response(response_content)
             if isinstance(content, str):
-                content = json.loads(content)
+                content = orjson.loads(content)
             if isinstance(content, str):
-                content = json.loads(content)
+                content = orjson.loads(content)
             logger.debug("Successfully parsed response on attempt %s", attempt)
             return content
         except json.JSONDecodeError as e:
             last_exception = e
             logger.debug("JSON decode failed on attempt %s: %s", attempt, e)
+            repaired = _repair_json(extracted)
+            if repaired is not None:
+                logger.debug("Repaired JSON locally on attempt %s", attempt)
+                return repaired
             if llm is None:
                 break
             recovery_prompt = {
@@ -68,48 +154,99 @@ Return ONLY the corrected JSON.
     raise ValueError(f"Model response could not be parsed: {last_exception}")
 
 
-@wrap_tool_call
-def handle_tool_errors(request, handler):
-    try:
-        return handler(request)
-    except Exception as e:
-        return ToolMessage(
-            content=f"Tool error: Please check your input and try again. ({str(e)})",
-            tool_call_id=request.tool_call["id"],
-        )
+TOOL_ERROR_PREFIX = "Tool error:"
+
+
+def _tool_error_message(request, error: Exception) -> ToolMessage:
+    return ToolMessage(
+        content=f"{TOOL_ERROR_PREFIX} Please check your input and try again. ({str(error)})",
+        tool_call_id=request.tool_call["id"],
+        status="error",
+    )
+
 
+class ToolErrorMiddleware(AgentMiddleware):
+    """Turn tool exceptions into error ToolMessages for sync and async agent runs."""
 
-def serialize_messages(msgs: List[Any]) -> List[Dict[str, Any]]:
-    cleaned = []
-
-    for m in msgs:
-        entry: Dict[str, Any] = {
-            "type": m.__class__.__name__,
-            "content": m.content,
-        }
-        if hasattr(m, "tool_calls") and m.tool_calls:
-            entry["tool_calls"] = [
-                {
-                    "name": tc.get("name"),
-                    "args": tc.get("args"),
-                    "id": tc.get("id"),
-                }
-                for tc in m.tool_calls
-            ]
-        if hasattr(m, "tool_call_id"):
-            entry["tool_call_id"] = m.tool_call_id
-
-        cleaned.append(entry)
-
-    return cleaned
-
-
-def filter_tool_messages(messages: List[Any]) -> List[Any]:
-    return [
-        m
-        for m in messages
-        if (
-            (isinstance(m, AIMessage) and getattr(m, "tool_calls", None))
-            or isinstance(m, ToolMessage)
+    def wrap_tool_call(self, request, handler):
+        try:
+            return handler(request)
+        except Exception as e:
+            return _tool_error_message(request, e)
+
+    async def awrap_tool_call(self, request, handler):
+        try:
+            return await handler(request)
+        except Exception as e:
+            return _tool_error_message(request, e)
+
+
+handle_tool_errors = ToolErrorMiddleware()
+
+
+class ModelConcurrencyMiddleware(AgentMiddleware):
+    """Cap the number of in-flight LLM calls across every agent sharing this instance.
+
+    Sub-agents fan out concurrently (parallel tool calls, the parallel
+    analysis tool), so without a cap a single RCA can burst past the
+    provider's rate limit.
+    """
+
+    def __init__(self, limit: int) -> None:
+        super().__init__()
+        self.limit = limit
+        self._thread_semaphore = threading.BoundedSemaphore(limit)
+        # asyncio semaphores are bound to one event loop.
+        self._loop_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
         )
-    ]
+
+    def wrap_model_call(self, request, handler):
+        with self._thread_semaphore:
+            return handler(request)
+
+    async def awrap_model_call(self, request, handler):
+        loop = asyncio.get_running_loop()
+        semaphore = self._loop_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._loop_semaphores.setdefault(loop, asyncio.Semaphore(self.limit))
+        async with semaphore:
+            return await handler(request)
+
+
+# Message classes are pydantic models, so whether a message carries
+# tool_calls / tool_call_id is a property of its class, checked once.
+_message_fields: Dict[type, Tuple[bool, bool]] = {}
+
+
+def _serialize_message(m: Any) -> Dict[str, Any]:
+    cls = m.__class__
+    fields = _message_fields.get(cls)
+    if fields is None:
+        fields = _message_fields.setdefault(cls, (hasattr(m, "tool_calls"), hasattr(m, "tool_call_id")))
+    has_tool_calls, has_tool_call_id = fields
+
+    entry: Dict[str, Any] = {
+        "type": cls.__name__,
+        "content": m.content,
+    }
+    if has_tool_calls and m.tool_calls:
+        entry["tool_calls"] = [
+            {"name": tc.get("name"), "args": tc.get("args"), "id": tc.get("id")} for tc in m.tool_calls
+        ]
+    if has_tool_call_id:
+        entry["tool_call_id"] = m.tool_call_id
+    return entry
+
+
+def serialize_messages(msgs: Iterable[Any]) -> List[Dict[str, Any]]:
+    # Entries are built fresh on every call: trace entries are mutated
+    # downstream (e.g. marked as cached), and a message's content can change
+    # under the same id, so sharing them across traces is not safe.
+    return [_serialize_message(m) for m in msgs]
+
+
+def filter_tool_messages(messages: Iterable[Any]) -> Iterator[Any]:
+    for m in messages:
+        if isinstance(m, ToolMessage) or (isinstance(m, AIMessage) and getattr(m, "tool_calls", None)):
+            yield m
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from rca_app.config import AppConfig
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+
+@pytest.fixture
+def config(tmp_path: Path) -> AppConfig:
+    """Offline config over the sample CSVs; nothing here talks to Azure."""
+    return AppConfig(
+        azure_openai_endpoint="",
+        azure_openai_api_key="",
+        azure_openai_deployment="",
+        azure_openai_api_version="",
+        embeddings_model="",
+        embeddings_endpoint="",
+        embeddings_api_key="",
+        embeddings_api_version="",
+        data_dir=DATA_DIR,
+        salesforce_mcp_url="http://localhost:8600",
+        sap_mcp_url="http://localhost:8700",
+    )
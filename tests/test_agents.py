@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.store.memory import InMemoryStore
+
+from rca_app import agents
+from rca_app.agents import _create_react_agent, _has_root_cause, _with_semantic_cache, build_agents
+from rca_app.semantic_cache import SemanticCache
+
+
+def _lookup_tool(label: str):
+    @tool
+    def lookup(query: str) -> str:
+        """Look something up."""
+        return label
+
+    return lookup
+
+
+def test_agents_are_reused_only_for_the_same_tool_objects(config):
+    llm = GenericFakeChatModel(messages=iter([]))
+    store, checkpointer = InMemoryStore(), InMemorySaver()
+    first_tool = _lookup_tool("first")
+
+    agent = _create_react_agent("lookup", config, llm, [first_tool], store, checkpointer)
+
+    assert _create_react_agent("lookup", config, llm, [first_tool], store, checkpointer) is agent
+    # Same tool name, but a new closure (as a later build_agents call makes).
+    rebuilt = _create_react_agent("lookup", config, llm, [_lookup_tool("second")], store, checkpointer)
+    assert rebuilt is not agent
+
+
+def test_has_root_cause_accepts_bare_and_enveloped_outputs():
+    assert _has_root_cause('{"primary_root_causes": ["late truck"]}')
+    assert _has_root_cause('{"root_cause": {"primary_root_causes": ["late truck"]}}')
+    assert _has_root_cause('{"summary": "late truck from the central warehouse"}')
+    assert _has_root_cause("Late truck from the central warehouse")
+
+
+def test_has_root_cause_rejects_empty_outputs():
+    empty_outputs = [
+        "",
+        "  ",
+        "null",
+        "{}",
+        "[]",
+        '{"primary_root_causes": []}',
+        '{"root_cause": {}}',
+        '{"root_cause": {"primary_root_causes": []}}',
+    ]
+    for empty in empty_outputs:
+        assert not _has_root_cause(empty), empty
+
+
+def test_build_agents_reuses_the_router_across_calls(config, monkeypatch):
+    llm = GenericFakeChatModel(messages=iter([]))
+    monkeypatch.setattr(agents, "_llm_for", lambda _config: llm)
+    config = dataclasses.replace(config, semantic_cache_enabled=False)
+    store, checkpointer = InMemoryStore(), InMemorySaver()
+
+    first = build_agents(config, store, checkpointer)
+    second = build_agents(config, store, checkpointer)
+
+    assert second["router_agent"] is first["router_agent"]
+    # A different store still gets its own router.
+    assert build_agents(config, InMemoryStore(), checkpointer)["router_agent"] is not first["router_agent"]
+
+
+def _cached_run(cache, memory_context, output):
+    runs = []
+
+    async def run():
+        runs.append(memory_context)
+        return output
+
+    messages = [
+        {"role": "system", "content": "You are an RCA agent."},
+        {"role": "user", "content": f"Memory context: {memory_context}"},
+        {"role": "user", "content": "Why did Store North stock out?"},
+    ]
+    result = asyncio.run(
+        _with_semantic_cache(cache, ("sales", "user"), messages, run, "Why did Store North stock out?")
+    )
+    return result, runs
+
+
+def test_semantic_cache_ignores_memory_context_in_the_fingerprint():
+    cache = SemanticCache(lambda text: [1.0, 0.0])
+    output = {"sales_insights": {"S001": "promo spike"}, "trace": [{"agent": "SalesAnalysisAgent", "calls": []}]}
+
+    _, first_runs = _cached_run(cache, "last week: Store South", output)
+    result, second_runs = _cached_run(cache, "last week: Store East and a promo", output)
+
+    assert first_runs and not second_runs
+    assert result["trace"][0]["cached"] is True
+
+
+def test_semantic_cache_skips_tool_errors_and_missing_insights():
+    cache = SemanticCache(lambda text: [1.0, 0.0])
+    failed_call = {
+        "agent": "SalesAnalysisAgent",
+        "calls": [{"type": "ToolMessage", "content": "Tool error: Please check your input and try again. (boom)"}],
+    }
+
+    _cached_run(cache, "a", {"sales_insights": {"S001": "?"}, "trace": [failed_call]})
+    _cached_run(cache, "b", {"sales_insights": None, "trace": []})
+    _, runs = _cached_run(cache, "c", {"sales_insights": {}, "trace": []})
+
+    assert runs == ["c"]
+    assert len(cache) == 1
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import pytest
+
+from rca_app.inventory_mcp_server import (
+    get_daily_inventory_for_store,
+    get_unique_stores,
+    init_inventory_mcp_server,
+    theoretical_onhand_after_promo_sales,
+)
+from rca_app.sales_mcp_server import (
+    get_daily_sales,
+    get_promo_period,
+    get_promo_sales_by_store,
+    init_sales_mcp_server,
+)
+
+STORES = ["S001", "S002", "S003", "S004", "S005"]
+
+
+@pytest.fixture(autouse=True)
+def servers(config):
+    init_sales_mcp_server(config)
+    init_inventory_mcp_server(config)
+
+
+def test_daily_sales_only_has_observed_store_days():
+    records = get_daily_sales()
+
+    assert len(records) == 60
+    assert {r["store_id"] for r in records} == set(STORES)
+    assert all(r["quantity_sold"] > 0 for r in records)
+
+
+def test_promo_sales_by_store():
+    records = get_promo_sales_by_store()
+
+    assert [r["store_id"] for r in records] == STORES
+    assert records[0] == {"store_id": "S001", "store_name": "Downtown Store", "promo_qty_sold": 192}
+
+
+def test_unique_stores_include_inventory_locations():
+    stores = get_unique_stores()["stores"]
+
+    assert stores[: len(STORES)] == STORES
+    assert stores == sorted(stores)
+
+
+def test_theoretical_onhand_after_promo_sales():
+    records = theoretical_onhand_after_promo_sales(**get_promo_period())
+
+    assert [r["store_id"] for r in records] == STORES
+    assert records[0] == {
+        "store_id": "S001",
+        "store_name": "Downtown Store",
+        "start_receipt_qty": 300,
+        "net_qty_after": 250,
+        "promo_qty_sold": 192,
+        "promo_repl_qty": 0,
+        "theoretical_after_changes": 550,
+        "theoretical_onhand_after_promo_sales": 358,
+    }
+
+
+def test_daily_inventory_for_store_runs_cumulatively():
+    records = get_daily_inventory_for_store("S001")
+
+    assert records
+    assert {r["store"] for r in records} == {"S001"}
+    dates = [r["transaction_date"] for r in records]
+    assert dates == sorted(dates)
+    running = 0.0
+    for r in records:
+        running += r["quantity"] - r["quantity_sold"]
+        assert r["running_inventory"] == pytest.approx(running)
+
+
+def test_daily_inventory_for_unknown_store_is_empty():
+    assert get_daily_inventory_for_store("S999") == []
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+import pytest
+
+from rca_app.llm import BatchingEmbeddings, _http_clients, get_embeddings
+
+
+class RecordingEmbeddings(Embeddings):
+    def __init__(self, hold_first: threading.Event | None = None) -> None:
+        self.batches: List[List[str]] = []
+        self.first_started = threading.Event()
+        self._hold_first = hold_first
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        if len(self.batches) == 1:
+            self.first_started.set()
+            if self._hold_first is not None:
+                self._hold_first.wait(5)
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_lone_query_is_sent_without_waiting():
+    inner = RecordingEmbeddings()
+    batching = BatchingEmbeddings(inner, window=2.0)
+
+    started = time.perf_counter()
+    assert batching.embed_query("abc") == [3.0]
+    assert asyncio.run(batching.aembed_query("abcd")) == [4.0]
+
+    assert time.perf_counter() - started < 1.0
+    assert inner.batches == [["abc"], ["abcd"]]
+
+
+def test_queries_arriving_during_a_request_share_one_batch():
+    release = threading.Event()
+    inner = RecordingEmbeddings(hold_first=release)
+    batching = BatchingEmbeddings(inner, window=0.2)
+    results = {}
+
+    def query(text):
+        results[text] = batching.embed_query(text)
+
+    first = threading.Thread(target=query, args=("a",))
+    first.start()
+    assert inner.first_started.wait(5)
+
+    # Both arrive while "a" is in flight, so they are held for the window
+    # and sent together.
+    followers = [threading.Thread(target=query, args=(text,)) for text in ("bb", "ccc")]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [first, *followers]:
+        thread.join(5)
+
+    assert results == {"a": [1.0], "bb": [2.0], "ccc": [3.0]}
+    assert inner.batches[0] == ["a"]
+    assert sorted(inner.batches[1]) == ["bb", "ccc"]
+    assert len(inner.batches) == 2
+
+
+@pytest.fixture
+def http_url():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = b"ok"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+def test_shared_async_client_survives_loop_changes(http_url):
+    client = _http_clients()["http_async_client"]
+
+    async def fetch():
+        return (await client.get(http_url)).text
+
+    # Each asyncio.run uses (and then closes) a new loop, as separate
+    # run_sync threads and the CLI loop do.
+    for _ in range(3):
+        assert asyncio.run(fetch()) == "ok"
+
+
+@pytest.fixture
+def embeddings_endpoint():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            texts = request["input"] if isinstance(request["input"], list) else [request["input"]]
+            body = json.dumps(
+                {
+                    "object": "list",
+                    "model": request["model"],
+                    "data": [
+                        {"object": "embedding", "index": i, "embedding": [1.0, float(i)]}
+                        for i in range(len(texts))
+                    ],
+                    "usage": {"prompt_tokens": 1, "total_tokens": 1},
+                }
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_async_embeddings_work_from_successive_loops(config, embeddings_endpoint):
+    embeddings = get_embeddings(
+        dataclasses.replace(config, embeddings_endpoint=embeddings_endpoint, embeddings_api_key="test")
+    )
+    # Token-length checks would download a tiktoken encoding.
+    embeddings.check_embedding_ctx_length = False
+    batching = BatchingEmbeddings(embeddings)
+
+    for i in range(3):
+        assert asyncio.run(batching.aembed_documents([f"a{i}", f"b{i}"])) == [[1.0, 0.0], [1.0, 1.0]]
+        assert asyncio.run(batching.aembed_query(f"c{i}")) == [1.0, 0.0]
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import socket
+import threading
+import time
+
+import pytest
+
+from rca_app.mcp_servers import run_salesforce_mcp
+from rca_app.mcp_toolset import MCPToolsetClient, _get_background_loop
+from rca_app.utils import run_sync
+
+
+@pytest.fixture
+def sales_mcp_url(config):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    threading.Thread(
+        target=run_salesforce_mcp, args=(config, "127.0.0.1", port), daemon=True
+    ).start()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def test_async_calls_from_many_loops_share_one_background_session(sales_mcp_url):
+    client = MCPToolsetClient(sales_mcp_url)
+    results = []
+
+    def worker():
+        results.append(run_sync(client.acall_tool("get_promo_period", {})))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 4
+    assert all(result == results[0] for result in results)
+    _, owner = client._session_entry
+    assert owner.get_loop() is _get_background_loop()
+    assert client.call_tool("get_promo_period", {}) == results[0]
+    assert client._session_entry[1] is owner
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import sqlite3
+
+from langchain_core.embeddings import Embeddings
+from langgraph.store.memory import InMemoryStore
+
+from rca_app.persistent_store import SQLiteBackedStore
+
+VOCABULARY = ("stockout", "promo", "transfer", "shrink")
+
+
+class KeywordEmbeddings(Embeddings):
+    """One dimension per vocabulary word, so similarity is predictable."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        words = text.lower().split()
+        return [float(word in words) for word in VOCABULARY] + [0.01]
+
+
+def _index():
+    return {"dims": len(VOCABULARY) + 1, "embed": KeywordEmbeddings(), "fields": ["text"]}
+
+
+def _listing(items):
+    return [(item.namespace, item.key, item.value) for item in items]
+
+
+# Interleaved namespaces, an update in place and a delete + re-insert.
+WRITES = [
+    (("episodic", "u1"), "a", {"text": "promo spike", "n": 1}),
+    (("semantic", "u1"), "a", {"text": "transfer delay", "n": 2}),
+    (("semantic", "u1"), "z", {"text": "shrink audit", "n": 8}),
+    (("episodic", "u1"), "b", {"text": "stockout at north", "n": 3}),
+    (("episodic", "u10"), "a", {"text": "shrink", "n": 4}),
+    (("episodic", "u1", "old"), "a", {"text": "promo ended", "n": 5}),
+    (("episodic", "u1"), "a", {"text": "promo spike again", "n": 6}),
+    (("semantic", "u1"), "a", None),
+    (("semantic", "u1"), "a", {"text": "transfer back", "n": 7}),
+]
+
+
+def _apply(store):
+    for namespace, key, value in WRITES:
+        if value is None:
+            store.delete(namespace, key)
+        else:
+            store.put(namespace, key, value)
+
+
+def test_round_trip_get_put_delete(tmp_path):
+    store = SQLiteBackedStore(tmp_path / "memory.sqlite")
+    store.put(("episodic", "u1"), "k", {"text": "promo spike", "nested": {"stores": ["S001"]}})
+
+    item = store.get(("episodic", "u1"), "k")
+    assert item.value == {"text": "promo spike", "nested": {"stores": ["S001"]}}
+    assert item.namespace == ("episodic", "u1")
+
+    store.put(("episodic", "u1"), "k", {"text": "updated"})
+    updated = store.get(("episodic", "u1"), "k")
+    assert updated.value == {"text": "updated"}
+    assert updated.created_at == item.created_at
+
+    store.delete(("episodic", "u1"), "k")
+    assert store.get(("episodic", "u1"), "k") is None
+
+
+def test_search_matches_in_memory_store_order_and_prefixes(tmp_path):
+    store = SQLiteBackedStore(tmp_path / "memory.sqlite")
+    reference = InMemoryStore()
+    _apply(store)
+    _apply(reference)
+
+    for prefix in [(), ("episodic",), ("episodic", "u1"), ("semantic",)]:
+        for offset, limit in [(0, 10), (1, 2)]:
+            assert _listing(store.search(prefix, offset=offset, limit=limit)) == _listing(
+                reference.search(prefix, offset=offset, limit=limit)
+            ), (prefix, offset, limit)
+
+    # ("episodic", "u1") must not match the sibling ("episodic", "u10").
+    assert {item.namespace for item in store.search(("episodic", "u1"))} == {
+        ("episodic", "u1"),
+        ("episodic", "u1", "old"),
+    }
+    assert _listing(store.search(("episodic",), filter={"n": {"$gte": 4}})) == _listing(
+        reference.search(("episodic",), filter={"n": {"$gte": 4}})
+    )
+
+
+def test_vector_search_ranks_like_in_memory_store(tmp_path):
+    store = SQLiteBackedStore(tmp_path / "memory.sqlite", index=_index())
+    reference = InMemoryStore(index=_index())
+    _apply(store)
+    _apply(reference)
+
+    found = store.search(("episodic",), query="promo", limit=3)
+    expected = reference.search(("episodic",), query="promo", limit=3)
+    assert _listing(found) == _listing(expected)
+    assert [round(item.score, 5) for item in found] == [round(item.score, 5) for item in expected]
+
+
+def test_reopen_keeps_records_and_backfills_vectors(tmp_path):
+    path = tmp_path / "memory.sqlite"
+    _apply(SQLiteBackedStore(path))
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM memory_store WHERE vectors IS NOT NULL").fetchone()[0] == 0
+
+    reopened = SQLiteBackedStore(path, index=_index())
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM memory_store WHERE vectors IS NULL").fetchone()[0] == 0
+
+    assert reopened.get(("episodic", "u1"), "b").value == {"text": "stockout at north", "n": 3}
+    best = reopened.search(("episodic",), query="stockout", limit=1)[0]
+    assert (best.namespace, best.key) == (("episodic", "u1"), "b")
+    assert best.score > 0.9
+
+
+def test_concurrent_writes_are_all_persisted(tmp_path):
+    path = tmp_path / "memory.sqlite"
+    store = SQLiteBackedStore(path)
+
+    def write(worker):
+        for i in range(25):
+            store.put(("episodic", f"u{worker}"), str(i), {"worker": worker, "i": i})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(8)))
+
+    assert len(store.search(("episodic",), limit=1000)) == 200
+    reopened = SQLiteBackedStore(path)
+    assert [item.value["i"] for item in reopened.search(("episodic", "u3"), limit=100)] == list(range(25))
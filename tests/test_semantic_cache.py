@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import sqlite3
+
+import numpy as np
+
+from rca_app.semantic_cache import SQLiteBackedSemanticCache, lexical_fingerprint
+
+
+def test_fingerprint_separates_entities_without_digits():
+    assert lexical_fingerprint("Why did Store North stock out?") != lexical_fingerprint(
+        "Why did Store South stock out?"
+    )
+    assert lexical_fingerprint("Sales drop in May") != lexical_fingerprint("Sales drop in June")
+    assert lexical_fingerprint("Why did S003 stock out") != lexical_fingerprint("Why did S004 stock out")
+
+
+def test_fingerprint_ignores_filler_words_and_case():
+    assert lexical_fingerprint("Why did Store North stock out?") == lexical_fingerprint(
+        "store north stock out"
+    )
+
+
+def _row_count(path) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM semantic_cache").fetchone()[0]
+
+
+def test_sqlite_cache_prunes_on_write(tmp_path):
+    path = tmp_path / "semantic_cache.sqlite"
+    cache = SQLiteBackedSemanticCache(path, lambda text: [1.0, 0.0], maxsize=2)
+    vector = np.array([1.0, 0.0], dtype=np.float32)
+
+    for i in range(5):
+        cache.put(("agent", "user"), vector, {"answer": i}, lexical_key=str(i))
+
+    assert _row_count(path) == 2
+    assert len(cache) == 2
+
+    # An expired row is dropped by the next write, not only on restart.
+    cache.ttl_seconds = 0.0
+    with cache._conn:
+        cache._conn.execute("UPDATE semantic_cache SET created_at = created_at - 10")
+    cache.put(("agent", "user"), vector, {"answer": "fresh"}, lexical_key="fresh")
+    assert _row_count(path) == 1
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from langchain_core.messages import AIMessage
+
+from rca_app.utils import run_sync, serialize_messages
+
+
+def test_run_sync_reuses_the_loop_within_a_thread():
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    assert run_sync(current_loop()) is run_sync(current_loop())
+
+
+def test_run_sync_from_concurrent_threads():
+    barrier = threading.Barrier(4)
+
+    async def work(i):
+        await asyncio.sleep(0.01)
+        return i, asyncio.get_running_loop()
+
+    def call(i):
+        # Line the threads up so their loops are running at the same time.
+        barrier.wait()
+        return run_sync(work(i))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(call, range(4)))
+
+    assert [i for i, _ in results] == [0, 1, 2, 3]
+    assert len({id(loop) for _, loop in results}) == 4
+
+
+def test_run_sync_closes_a_threads_loop_when_the_thread_exits():
+    loops = []
+
+    async def leave_work_behind():
+        loops.append(asyncio.get_running_loop())
+        # Left pending on purpose; closing the loop must cancel it cleanly.
+        asyncio.get_running_loop().create_task(asyncio.sleep(60))
+
+    thread = threading.Thread(target=run_sync, args=(leave_work_behind(),))
+    thread.start()
+    thread.join()
+
+    assert loops[0].is_closed()
+
+
+def test_serialize_messages_returns_fresh_entries():
+    message = AIMessage(content="first", id="msg-1")
+    first = serialize_messages([message])
+    first[0]["cached"] = True
+
+    # Same id, new content: nothing stale or mutated may come back.
+    assert serialize_messages([AIMessage(content="second", id="msg-1")]) == [
+        {"type": "AIMessage", "content": "second"}
+    ]
+    assert serialize_messages([message]) == [{"type": "AIMessage", "content": "first"}]